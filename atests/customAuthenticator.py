@@ -1,11 +1,24 @@
-from requests.auth import HTTPBasicAuth
+import base64
+
+import httpx
 
 
 # Example of a keyword that a test author would supply in order to use the
 # `Create Custom Session` keyword.  Such a keyword can return any subclass
-# of `AuthBase`.
-# http://docs.python-requests.org/en/master/user/advanced/#custom-authentication
+# of `httpx.Auth`.
+# https://www.python-httpx.org/advanced/authentication/#custom-authentication-schemes
+
+
+class CustomBasicAuth(httpx.Auth):
+
+    def __init__(self, user, pwd):
+        credentials = '{}:{}'.format(user, pwd).encode('utf-8')
+        self._auth_header = 'Basic ' + base64.b64encode(credentials).decode('ascii')
+
+    def auth_flow(self, request):
+        request.headers['Authorization'] = self._auth_header
+        yield request
 
 
 def get_custom_auth(user, pwd):
-    return HTTPBasicAuth(user, pwd)
+    return CustomBasicAuth(user, pwd)
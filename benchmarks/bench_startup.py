@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+"""
+Startup benchmark of HttpxLibrary.
+
+Measures, and prints as JSON:
+
+- cold import time of ``HttpxLibrary`` in a fresh interpreter, with and without
+  Robot Framework already imported (as it is when Robot loads the library)
+- instantiation time of the library
+- latency of the first and of the following requests of a new session
+  against a local HTTP server
+
+Usage: python benchmarks/bench_startup.py [--repeat N] [--output FILE]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+IMPORT_SNIPPET = """
+import time
+{preload}
+start = time.perf_counter()
+import HttpxLibrary
+print(time.perf_counter() - start)
+"""
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # keep-alive responses are written in two sends, avoid the delayed ACK stall
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"status": "ok"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def summarize(samples):
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'max': max(samples),
+        'samples': len(samples),
+    }
+
+
+def measure_cold_import(repeat, preload):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_DIR, os.environ.get('PYTHONPATH')])))
+    code = IMPORT_SNIPPET.format(preload='import robot.api' if preload else '')
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', code], env=env)
+        samples.append(float(output.decode().strip().splitlines()[-1]))
+    return summarize(samples)
+
+
+def measure_instantiation(repeat):
+    from HttpxLibrary import HttpxLibrary
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        HttpxLibrary()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def measure_requests(repeat):
+    from HttpxLibrary import HttpxLibrary
+    server = ThreadingHTTPServer(('127.0.0.1', 0), QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = 'http://127.0.0.1:%s' % server.server_address[1]
+    first, following = [], []
+    try:
+        for index in range(repeat):
+            library = HttpxLibrary()
+            alias = 'bench%s' % index
+            library.create_session(alias, url, log_policy='off')
+            start = time.perf_counter()
+            library.get_on_session(alias, '/')
+            first.append(time.perf_counter() - start)
+            for _ in range(10):
+                start = time.perf_counter()
+                library.get_on_session(alias, '/')
+                following.append(time.perf_counter() - start)
+            library.delete_all_sessions()
+    finally:
+        server.shutdown()
+        server.server_close()
+    return {'first_request': summarize(first), 'following_requests': summarize(following)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=10, help='repetitions of each measure')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    sys.path.insert(0, SRC_DIR)
+    from HttpxLibrary import VERSION
+
+    report = {
+        'library_version': VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'unit': 'seconds',
+        'cold_import': measure_cold_import(args.repeat, preload=False),
+        'cold_import_with_robot_loaded': measure_cold_import(args.repeat, preload=True),
+        'instantiation': measure_instantiation(args.repeat),
+    }
+    report.update(measure_requests(args.repeat))
+
+    text = json.dumps(report, indent=4, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
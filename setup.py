@@ -25,7 +25,7 @@ Programming Language :: Python :: 3.9
 Topic :: Software Development :: Testing
 """[1:-1]
 
-INSTALL_REQUIRE = ['robotframework>=3.2.2', 'httpx[http2]>=0.18.2', 'requests']
+INSTALL_REQUIRE = ['robotframework>=3.2.2', 'httpx[http2]>=0.18.2']
 TEST_REQUIRE = ['pytest', 'flask==2.*', 'six', 'coverage', 'flake8', 'Werkzeug==2.*']
 NTLM_REQUIRE = ['httpx_ntlm']
 
@@ -58,5 +58,8 @@ setup(name='robotframework-httpx',
       install_requires=INSTALL_REQUIRE,
       extras_require={
           'ntlm': NTLM_REQUIRE,
+          'orjson': ['orjson'],
+          'ujson': ['ujson'],
+          'msgspec': ['msgspec'],
           'test': TEST_REQUIRE
       })
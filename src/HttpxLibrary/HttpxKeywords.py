@@ -1,9 +1,12 @@
 from abc import abstractmethod
 
 import robot
+from robot.api import logger
 from robot.api.deco import keyword
 from robot.libraries.BuiltIn import BuiltIn
 
+from HttpxLibrary import jsoncodec, sslcontext
+
 
 class HttpxKeywords(object):
     ROBOT_LIBRARY_SCOPE = 'Global'
@@ -11,7 +14,6 @@ class HttpxKeywords(object):
     def __init__(self):
         self._cache = robot.utils.ConnectionCache('No sessions created')
         self.builtin = BuiltIn()
-        self.debug = 1
 
     @keyword("Status Should Be")
     def status_should_be(self, expected_status, response, msg=None):
@@ -50,6 +52,41 @@ class HttpxKeywords(object):
         """
         self._check_status(None, response, msg)
 
+    @staticmethod
+    @keyword("Set JSON Backend")
+    def set_json_backend(backend):
+        """
+        Selects the JSON library used to serialize ``json`` request bodies, to decode
+        ``response.json()`` and to pretty print JSON, and returns the name of the previous one.
+
+        ``backend`` is one of ``json`` (the Python standard library, default), ``orjson``,
+        ``ujson`` or ``msgspec``. The selected module must be installed.
+
+        The backend applies to the whole library, all sessions included.
+
+        Example:
+        | ${previous}= | Set JSON Backend | orjson |
+        | ${resp}=     | GET On Session   | my_session | /large-document |
+        | Set JSON Backend | ${previous} |
+        """
+        previous = jsoncodec.set_json_codec(backend)
+        logger.info("JSON backend set to %s" % jsoncodec.get_json_codec().name)
+        return previous.name
+
+    @staticmethod
+    @keyword("Clear SSL Context Cache")
+    def clear_ssl_context_cache():
+        """
+        Forgets the SSL contexts cached by the session creation keywords.
+
+        Sessions created with the same ``verify`` and ``cert`` settings share one SSL context,
+        so the CA bundle and the client certificate are read from disk only once. Use this
+        keyword after replacing a certificate or CA bundle file, the following sessions
+        load it again. Existing sessions keep their context.
+        """
+        cleared = sslcontext.clear_ssl_context_cache()
+        logger.info("Cleared %s cached SSL contexts" % cleared)
+
     @staticmethod
     @keyword("Get File For Streaming Upload")
     def get_file_for_streaming_upload(path):
@@ -4,6 +4,9 @@ from robot.api.deco import keyword
 from HttpxLibrary.utils import warn_if_equal_symbol_in_url
 from .SessionKeywords import SessionKeywords
 
+# streams in flight when the connection does not report its limit, the httpcore client setting
+DEFAULT_HTTP2_STREAMS = 100
+
 
 class HttpxOnSessionKeywords(SessionKeywords):
 
@@ -223,6 +226,116 @@ class HttpxOnSessionKeywords(SessionKeywords):
         self._check_status(expected_status, response, msg)
         return response
 
+    @warn_if_equal_symbol_in_url
+    @keyword("Download File On Session")
+    def download_file_on_session(self, alias, url, path, params=None, chunk_size=65536,
+                                 expected_status=None, msg=None, **kwargs):
+        """
+        Sends a GET request on a previously created HTTP Session and streams the response body to a file.
+
+        Session will be identified using the ``alias`` name.
+        The body of the response is written to ``path`` in chunks of ``chunk_size`` bytes
+        as it is received, so it is never held in memory nor logged. Content-Encoding such as
+        gzip is decoded while writing.
+
+        The status of the response is checked before anything is written, by default this keyword
+        fails if a status code with error values is returned, this behavior can be modified using the
+        ``expected_status`` and ``msg`` parameters as in `GET On Session`.
+
+        Other optional requests arguments (``headers``, ``cookies``, ``auth``, ``follow_redirects``,
+        ``timeout``) can be passed using ``**kwargs``.
+
+        The returned object exposes ``status_code``, ``reason_phrase``, ``headers``, ``url``, ``path``,
+        ``bytes_written`` and ``elapsed``, the time from sending the request to the end of the download.
+
+        Example:
+        | ${download}= | Download File On Session | my_session | /artifacts/image.iso | ${TEMPDIR}/image.iso |
+        | Should Be Equal As Integers | ${download.bytes_written} | 2147483648 |
+        """
+        session = self._cache.switch(alias)
+        return self._common_download(session, url, path, chunk_size,
+                                     expected_status, msg, params=params, **kwargs)
+
+    @keyword("Send Requests Concurrently")
+    def send_requests_concurrently(self, alias, requests, max_concurrency=10):
+        """
+        Sends a list of requests in parallel on a previously created HTTP Session
+        and returns the list of responses in the same order as ``requests``.
+
+        Session will be identified using the ``alias`` name.
+        Each item of ``requests`` is a dictionary describing one request:
+
+        | ``url``             | Endpoint of the request, mandatory. |
+        | ``method``          | HTTP method, defaults to ``GET``. |
+        | ``expected_status`` | Expected status of the response, see `Status Should Be`. |
+        | ``msg``             | Custom failure message of the status check. |
+
+        Any other entry (``params``, ``json``, ``data``, ``headers``, ...) is passed to the request
+        as in the `* On Session` keywords.
+
+        At most ``max_concurrency`` requests are in flight at the same time, all of them sharing the
+        connection pool of the session. Responses are logged and checked once all the requests
+        completed, the first failing status check fails the keyword.
+
+        Example:
+        | &{first}=       | Create Dictionary          | url=/anything/1     |                      |
+        | &{second}=      | Create Dictionary          | method=POST         | url=/anything/2      | json=${data} |
+        | @{requests}=    | Create List                | ${first}            | ${second}            |
+        | @{responses}=   | Send Requests Concurrently | my_session          | ${requests}          | max_concurrency=50 |
+        """
+        session = self._cache.switch(alias)
+        return self._common_requests_concurrently(session, requests, max_concurrency)
+
+    @keyword("Send Multiplexed HTTP2 Requests")
+    def send_multiplexed_http2_requests(self, alias, requests, max_streams=None):
+        """
+        Sends a list of requests as concurrent streams of a single HTTP/2 connection
+        of a previously created HTTP Session and returns the list of responses in the
+        same order as ``requests``.
+
+        Session will be identified using the ``alias`` name, it must negotiate HTTP/2,
+        see `Create HTTP2 Session`. Items of ``requests`` are dictionaries as in
+        `Send Requests Concurrently`.
+
+        The first request is sent alone to open the connection and receive the server
+        settings, the other ones are then multiplexed with at most as many streams in flight
+        as the server ``max_concurrent_streams`` setting allows, and at most ``max_streams``
+        when given. When the connection does not report the server setting, 100 streams,
+        the default limit of the client, are used. Responses are logged and checked once
+        all the requests completed.
+
+        Example:
+        | Create HTTP2 Session | nrf | https://nrf.example.com |
+        | @{responses}= | Send Multiplexed HTTP2 Requests | nrf | ${requests} | max_streams=64 |
+        """
+        session = self._cache.switch(alias)
+        requests = list(requests)
+        if not requests:
+            return []
+        responses = self._common_requests_concurrently(session, requests[:1], 1)
+        if responses[0].http_version != 'HTTP/2':
+            raise AssertionError(f"Session '{alias}' negotiated {responses[0].http_version} instead of HTTP/2")
+        streams = self._http2_max_streams(session)
+        if max_streams is not None:
+            streams = min(int(max_streams), streams) if streams else int(max_streams)
+        streams = streams or DEFAULT_HTTP2_STREAMS
+        logger.info(f'Multiplexing {len(requests) - 1} requests on {streams} concurrent streams')
+        return responses + self._common_requests_concurrently(session, requests[1:], streams)
+
+    def _http2_max_streams(self, session):
+        """
+        Number of concurrent streams allowed on the HTTP/2 connection of ``session``,
+        the lowest of the server and of the client settings, None when unknown so that
+        ``DEFAULT_HTTP2_STREAMS`` apply
+        """
+        for connection in self._pool_connections(session):
+            # httpcore does not expose the limit: its HTTPConnection wraps an HTTP2Connection
+            # keeping it in _max_streams, any other shape of these internals is ignored
+            max_streams = getattr(getattr(connection, '_connection', None), '_max_streams', None)
+            if isinstance(max_streams, int) and max_streams > 0:
+                return max_streams
+        return None
+
     @warn_if_equal_symbol_in_url
     @keyword("GET On Session With Retry")
     def get_on_session_with_retry(self, alias, url, params=None,
@@ -0,0 +1,219 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from httpx import AsyncClient
+from robot.api import logger
+from robot.api.deco import keyword
+
+from HttpxLibrary.histogram import LatencyHistogram
+from HttpxLibrary.jsoncodec import prepare_json_body
+
+
+class LoadResult:
+    """Outcome of a load run: counts per status code, errors and latencies"""
+
+    def __init__(self):
+        self.requests = 0
+        self.status_counts = {}
+        self.error_counts = {}
+        self.latency = LatencyHistogram()
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record_response(self, status_code: int, latency: float):
+        """Record a completed request"""
+        with self._lock:
+            self.requests += 1
+            self.status_counts[status_code] = self.status_counts.get(status_code, 0) + 1
+            self.latency.record(latency)
+
+    def record_error(self, error_name: str):
+        """Record a request that raised an exception"""
+        with self._lock:
+            self.requests += 1
+            self.error_counts[error_name] = self.error_counts.get(error_name, 0) + 1
+
+    @property
+    def errors(self) -> int:
+        return sum(self.error_counts.values())
+
+    @property
+    def achieved_rate(self) -> float:
+        """Completed requests per second over the whole run"""
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def latency_min(self) -> Optional[float]:
+        return self.latency.min
+
+    @property
+    def latency_max(self) -> Optional[float]:
+        return self.latency.max
+
+    @property
+    def latency_mean(self) -> Optional[float]:
+        return self.latency.mean
+
+    def latency_percentile(self, percentile: float) -> float:
+        """Latency in seconds of the given percentile of the successful requests"""
+        return self.latency.percentile(percentile)
+
+    def __str__(self):
+        return (f"requests={self.requests}, elapsed={self.elapsed:.3f}s, "
+                f"rate={self.achieved_rate:.2f}/s, status_counts={self.status_counts}, "
+                f"error_counts={self.error_counts}")
+
+
+class LoadKeywords:
+    """Keywords to generate rate controlled load on a session"""
+
+    @keyword("Run Load On Session")
+    def run_load_on_session(self,
+                            alias: str,
+                            url: str,
+                            method: str = 'GET',
+                            rate: float = 10.0,
+                            duration: Optional[float] = None,
+                            count: Optional[int] = None,
+                            max_concurrency: int = 10,
+                            **kwargs) -> LoadResult:
+        """
+        Sends the same request on a session at a target rate and returns a load result.
+
+        Requests are started every ``1 / rate`` seconds until ``duration`` seconds elapsed
+        or ``count`` requests were started, whichever comes first. At least one of them is
+        required. At most ``max_concurrency`` requests are in flight at the same time; when
+        the server cannot keep up, the achieved rate drops below the target rate.
+
+        The session keeps its own client, transport, ``limits``, authentication and headers.
+        Other request arguments (``params``, ``json``, ``headers``, ...) are passed using ``**kwargs``.
+        Single requests and responses are not logged, only a summary of the run.
+        With a circuit breaker in the retry configuration of the session, requests to an open
+        circuit are counted as ``CircuitOpenError`` errors without being sent.
+
+        The returned object exposes:
+
+        | = Attribute =   | = Explanation = |
+        | requests        | Number of completed requests, including failed ones. |
+        | status_counts   | Dictionary of response counts per status code. |
+        | error_counts    | Dictionary of exception counts per retry exception type (see `Get Retry Configuration`). |
+        | errors          | Total number of requests that raised an exception. |
+        | latency         | Latency histogram of the responses, see `Get Latency Percentile`. |
+        | latency_min     | Minimum latency in seconds. |
+        | latency_mean    | Mean latency in seconds. |
+        | latency_max     | Maximum latency in seconds. |
+        | elapsed         | Duration of the run in seconds. |
+        | achieved_rate   | Completed requests per second. |
+
+        Percentiles are available with ``${result.latency_percentile(99)}``.
+        Latencies are the ``elapsed`` times of the responses, as for the other keywords, so they
+        leave out the wait for a free connection or for the session rate limit. They are also
+        recorded in the latency histogram of the session.
+
+        Examples:
+        | ${result}= | Run Load On Session | my_session | /health | rate=50 | duration=30 |
+        | ${result}= | Run Load On Session | my_session | /api/submit | method=POST | rate=20 | count=1000 | json=${data} |
+        | Should Be Equal As Integers | ${result.status_counts}[${200}] | 1000 |
+        """
+        rate = float(rate)
+        max_concurrency = int(max_concurrency)
+        duration = float(duration) if duration is not None else None
+        count = int(count) if count is not None else None
+        if rate <= 0:
+            raise ValueError(f"rate must be greater than 0, got {rate}")
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        if duration is None and count is None:
+            raise ValueError("Either duration or count is required")
+
+        session = self._cache.switch(alias)
+        retry_config = self._get_retry_config(alias)
+        request_url = self._get_url(session, url)
+        method = method.lower()
+        kwargs = prepare_json_body(kwargs, session.headers)
+
+        def error_name(exception):
+            for exception_type in retry_config.retry_on_exceptions:
+                if isinstance(exception, exception_type):
+                    return exception_type.__name__
+            return type(exception).__name__
+
+        def schedule():
+            index = 0
+            while (count is None or index < count) and (duration is None or index / rate < duration):
+                yield index / rate
+                index += 1
+
+        result = LoadResult()
+        logger.info(f"Run Load On Session: {method.upper()} {request_url} rate={rate}/s, "
+                    f"duration={duration}, count={count}, max_concurrency={max_concurrency}")
+        method_function = getattr(session, method)
+        start = time.perf_counter()
+        if isinstance(session, AsyncClient):
+            self._run_coroutine(self._run_load_async(
+                lambda: self._call_with_circuit_breaker_async(alias, request_url,
+                                                              lambda: method_function(request_url, **kwargs)),
+                schedule(), max_concurrency, result, error_name))
+        else:
+            self._run_load_sync(
+                lambda: self._call_with_circuit_breaker(alias, request_url,
+                                                        lambda: method_function(request_url, **kwargs)),
+                schedule(), max_concurrency, result, error_name)
+        result.elapsed = time.perf_counter() - start
+        self._sessions[alias].latency_histogram.merge(result.latency)
+
+        logger.info(f"Load result: {result}")
+        return result
+
+    @staticmethod
+    def _run_load_sync(send_request, schedule, max_concurrency, result, error_name):
+        slots = threading.BoundedSemaphore(max_concurrency)
+
+        def send():
+            try:
+                response = send_request()
+            except Exception as e:
+                result.record_error(error_name(e))
+            else:
+                result.record_response(response.status_code, response.elapsed.total_seconds())
+            finally:
+                slots.release()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            for due in schedule:
+                delay = start + due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                slots.acquire()
+                executor.submit(send)
+
+    @staticmethod
+    async def _run_load_async(send_request, schedule, max_concurrency, result, error_name):
+        slots = asyncio.Semaphore(max_concurrency)
+        tasks = set()
+
+        async def send():
+            try:
+                response = await send_request()
+            except Exception as e:
+                result.record_error(error_name(e))
+            else:
+                result.record_response(response.status_code, response.elapsed.total_seconds())
+            finally:
+                slots.release()
+
+        start = time.perf_counter()
+        for due in schedule:
+            delay = start + due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await slots.acquire()
+            task = asyncio.ensure_future(send())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
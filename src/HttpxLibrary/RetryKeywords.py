@@ -1,11 +1,302 @@
+import math
 import time
 import random
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import List, Union, Callable, Optional
 from robot.api import logger
 from robot.api.deco import keyword
 import httpx
 from httpx import Response, HTTPStatusError, ConnectError, TimeoutException, RequestError
 
+from HttpxLibrary.exceptions import CircuitOpenError
+
+# rate limit reset values above this are epoch timestamps, below it delays in seconds
+EPOCH_THRESHOLD = 1e9
+
+
+def _parse_seconds(value: str) -> float:
+    """Parse a number of seconds, nan and infinite values raise ValueError as they cannot be waited"""
+    seconds = float(value)
+    if not math.isfinite(seconds):
+        raise ValueError(f"Not a finite number of seconds: {value}")
+    return seconds
+
+
+def _parse_delay(value: str, now: float) -> Optional[float]:
+    """Parse a delay in seconds or an HTTP-date, returns the number of seconds to wait from ``now``"""
+    value = value.strip()
+    try:
+        return max(_parse_seconds(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(date.timestamp() - now, 0.0)
+
+
+def _parse_rate_limit_reset(headers, now: float) -> Optional[float]:
+    """Delay until the rate limit window resets, when the remaining quota is exhausted"""
+    for prefix in ('ratelimit-', 'x-ratelimit-'):
+        remaining = headers.get(prefix + 'remaining')
+        reset = headers.get(prefix + 'reset')
+        if remaining is None or reset is None:
+            continue
+        try:
+            if float(remaining) > 0:
+                return None
+            reset = _parse_seconds(reset)
+        except ValueError:
+            continue
+        return max(reset - now, 0.0) if reset > EPOCH_THRESHOLD else max(reset, 0.0)
+    # structured field of the IETF draft: RateLimit: "default";r=0;t=30
+    rate_limit = headers.get('ratelimit')
+    if rate_limit:
+        parameters = dict(item.strip().partition('=')[::2] for item in rate_limit.split(';')[1:])
+        try:
+            if int(parameters.get('r', 1)) == 0 and 't' in parameters:
+                return max(_parse_seconds(parameters['t']), 0.0)
+        except ValueError:
+            return None
+    return None
+
+
+def get_server_delay(response: Response) -> Optional[float]:
+    """
+    Delay in seconds requested by the server before retrying, from the ``Retry-After``
+    header (seconds or HTTP-date) or from exhausted rate limit headers, None without any
+    """
+    headers = getattr(response, 'headers', None)
+    if not isinstance(headers, httpx.Headers):
+        return None
+    now = time.time()
+    retry_after = headers.get('retry-after')
+    if retry_after is not None:
+        return _parse_delay(retry_after, now)
+    return _parse_rate_limit_reset(headers, now)
+
+
+class RetryBudget:
+    """
+    Limits retries to a ratio of the requests sent in a sliding time window,
+    so that retries cannot multiply the load on a failing server
+    """
+    
+    def __init__(self, ratio: float, window: float = 60.0, min_retries: int = 10):
+        if ratio < 0:
+            raise ValueError(f"Retry budget ratio must not be negative, got {ratio}")
+        if window <= 0:
+            raise ValueError(f"Retry budget window must be greater than 0, got {window}")
+        self.ratio = ratio
+        self.window = window
+        self.min_retries = min_retries
+        self.total_requests = 0
+        self.total_retries = 0
+        self.rejected_retries = 0
+        self.last_rejected = None
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+    
+    def _prune(self, now: float):
+        for timestamps in (self._requests, self._retries):
+            while timestamps and timestamps[0] <= now - self.window:
+                timestamps.popleft()
+    
+    def record_request(self):
+        """Record the first attempt of a request"""
+        with self._lock:
+            self._requests.append(time.monotonic())
+            self.total_requests += 1
+    
+    def acquire_retry(self) -> bool:
+        """Record a retry and return True if the budget allows it, False otherwise"""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            if len(self._retries) + 1 > max(self.min_retries, self.ratio * len(self._requests)):
+                self.rejected_retries += 1
+                self.last_rejected = datetime.now().isoformat(timespec='seconds')
+                return False
+            self._retries.append(now)
+            self.total_retries += 1
+            return True
+    
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            self._prune(time.monotonic())
+            return {
+                'ratio': self.ratio,
+                'window': self.window,
+                'min_retries': self.min_retries,
+                'requests': len(self._requests),
+                'retries': len(self._retries),
+                'total_requests': self.total_requests,
+                'total_retries': self.total_retries,
+                'rejected_retries': self.rejected_retries,
+                'last_rejected': self.last_rejected
+            }
+
+
+class _HostCircuit:
+    """State of the circuit of one host"""
+    
+    def __init__(self, window: int):
+        self.state = CircuitBreaker.CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.times_opened = 0
+        self.rejected_requests = 0
+
+
+class CircuitBreaker:
+    """
+    Per host circuit breaker: when the failure rate of the last ``window`` requests to a host
+    reaches ``failure_rate``, the circuit opens and the requests to the host fail fast for
+    ``cooldown`` seconds, then a single trial request closes it again or reopens it
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+    
+    def __init__(self, failure_rate: float, window: int = 20, min_requests: int = 5, cooldown: float = 30.0):
+        if not 0 < failure_rate <= 1:
+            raise ValueError(f"Circuit breaker failure rate must be between 0 and 1, got {failure_rate}")
+        if window < 1 or min_requests < 1:
+            raise ValueError(f"Circuit breaker window and min_requests must be at least 1, "
+                             f"got {window} and {min_requests}")
+        if cooldown < 0:
+            raise ValueError(f"Circuit breaker cooldown must not be negative, got {cooldown}")
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_requests = min(min_requests, window)
+        self.cooldown = cooldown
+        self._circuits = {}
+        self._lock = threading.Lock()
+    
+    def _circuit(self, host: str) -> _HostCircuit:
+        circuit = self._circuits.get(host)
+        if circuit is None:
+            circuit = self._circuits[host] = _HostCircuit(self.window)
+        return circuit
+    
+    def _open(self, circuit: _HostCircuit):
+        circuit.state = self.OPEN
+        circuit.opened_at = time.monotonic()
+        circuit.times_opened += 1
+        circuit.outcomes.clear()
+    
+    def allow_request(self, host: str) -> bool:
+        """Return True if a request to ``host`` may be sent, False if it has to fail fast"""
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit.state == self.OPEN and time.monotonic() - circuit.opened_at >= self.cooldown:
+                circuit.state = self.HALF_OPEN
+            if circuit.state == self.HALF_OPEN and not circuit.trial_in_flight:
+                circuit.trial_in_flight = True
+                return True
+            if circuit.state != self.CLOSED:
+                circuit.rejected_requests += 1
+                return False
+            return True
+    
+    def record(self, host: str, failure: bool):
+        """Record the outcome of a request to ``host`` allowed by `allow_request`"""
+        with self._lock:
+            circuit = self._circuit(host)
+            if circuit.state == self.HALF_OPEN:
+                circuit.trial_in_flight = False
+                if failure:
+                    self._open(circuit)
+                else:
+                    circuit.state = self.CLOSED
+            elif circuit.state == self.CLOSED:
+                circuit.outcomes.append(failure)
+                if (len(circuit.outcomes) >= self.min_requests
+                        and sum(circuit.outcomes) / len(circuit.outcomes) >= self.failure_rate):
+                    self._open(circuit)
+    
+    def call(self, host: str, send: Callable, is_failure: Callable[[int], bool]):
+        """
+        Send a request to ``host`` with ``send`` if its circuit allows it, raise ``CircuitOpenError`` otherwise.
+        Responses with a status for which ``is_failure`` is true and all exceptions count as failures.
+        """
+        if not self.allow_request(host):
+            raise self._open_error(host)
+        failure = True
+        try:
+            response = send()
+            failure = is_failure(response.status_code)
+            return response
+        finally:
+            # also reached on interruption, so that a half-open circuit does not wait for its trial forever
+            self.record(host, failure)
+    
+    async def call_async(self, host: str, send: Callable, is_failure: Callable[[int], bool]):
+        """Awaitable version of `call` for a ``send`` returning a coroutine"""
+        if not self.allow_request(host):
+            raise self._open_error(host)
+        failure = True
+        try:
+            response = await send()
+            failure = is_failure(response.status_code)
+            return response
+        finally:
+            self.record(host, failure)
+    
+    def _open_error(self, host: str) -> CircuitOpenError:
+        return CircuitOpenError(f"Circuit breaker open for '{host}', retry in {self.retry_in(host):.2f} seconds")
+    
+    def is_closed(self, host: str) -> bool:
+        with self._lock:
+            return self._circuit(host).state == self.CLOSED
+    
+    def _retry_in(self, circuit: _HostCircuit) -> float:
+        if circuit.state != self.OPEN:
+            return 0.0
+        return max(circuit.opened_at + self.cooldown - time.monotonic(), 0.0)
+    
+    def retry_in(self, host: str) -> float:
+        """Seconds before an open circuit lets a trial request through"""
+        with self._lock:
+            return self._retry_in(self._circuit(host))
+    
+    def reset(self, host: Optional[str] = None):
+        """Close the circuit of ``host``, or of all the hosts, and forget its outcomes"""
+        with self._lock:
+            if host is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(host, None)
+    
+    def state(self, host: str) -> dict:
+        with self._lock:
+            circuit = self._circuit(host)
+            failures = sum(circuit.outcomes)
+            return {
+                'state': circuit.state,
+                'requests': len(circuit.outcomes),
+                'failures': failures,
+                'failure_rate': failures / len(circuit.outcomes) if circuit.outcomes else 0.0,
+                'times_opened': circuit.times_opened,
+                'rejected_requests': circuit.rejected_requests,
+                'retry_in': self._retry_in(circuit)
+            }
+    
+    @property
+    def hosts(self) -> List[str]:
+        with self._lock:
+            return list(self._circuits)
+
 
 class RetryConfig:
     """Configuration class for retry behavior"""
@@ -16,7 +307,11 @@ class RetryConfig:
                  backoff_max: float = 120.0,
                  retry_on_status: List[int] = None,
                  retry_on_exceptions: List[Exception] = None,
-                 jitter: bool = True):
+                 jitter: bool = True,
+                 deadline: Optional[float] = None,
+                 budget: Optional[RetryBudget] = None,
+                 respect_retry_after: bool = True,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
         self.max_retries = max_retries
         self.backoff_factor = backoff_factor
         self.backoff_max = backoff_max
@@ -25,17 +320,29 @@ class RetryConfig:
             ConnectError, TimeoutException, RequestError
         ]
         self.jitter = jitter
+        self.deadline = deadline
+        self.budget = budget
+        self.respect_retry_after = respect_retry_after
+        self.circuit_breaker = circuit_breaker
     
     def should_retry_status(self, status_code: int) -> bool:
         """Check if we should retry based on status code"""
         return status_code in self.retry_on_status
     
+    def is_failure_status(self, status_code: int) -> bool:
+        """Check if a response status counts as a failure for the circuit breaker"""
+        return status_code >= 500 or self.should_retry_status(status_code)
+    
     def should_retry_exception(self, exception: Exception) -> bool:
         """Check if we should retry based on exception type"""
         return any(isinstance(exception, exc_type) for exc_type in self.retry_on_exceptions)
     
-    def get_backoff_time(self, attempt: int) -> float:
-        """Calculate backoff time for given attempt"""
+    def get_backoff_time(self, attempt: int, response: Optional[Response] = None) -> float:
+        """Calculate backoff time for given attempt, or use the delay requested by the server in ``response``"""
+        if response is not None and self.respect_retry_after:
+            server_delay = get_server_delay(response)
+            if server_delay is not None:
+                return min(server_delay, self.backoff_max)
         backoff = self.backoff_factor * (2 ** attempt)
         if self.jitter:
             backoff *= (0.5 + random.random() * 0.5)  # Add jitter
@@ -55,7 +362,16 @@ class RetryKeywords:
                                      backoff_factor: float = 0.3,
                                      backoff_max: float = 120.0,
                                      retry_on_status: Union[str, List[int]] = "500,502,503,504,429",
-                                     jitter: bool = True):
+                                     jitter: bool = True,
+                                     deadline: Optional[float] = None,
+                                     retry_budget: Optional[float] = None,
+                                     budget_window: float = 60.0,
+                                     budget_min_retries: int = 10,
+                                     respect_retry_after: bool = True,
+                                     circuit_failure_rate: Optional[float] = None,
+                                     circuit_window: int = 20,
+                                     circuit_min_requests: int = 5,
+                                     circuit_cooldown: float = 30.0):
         """
         Sets global retry configuration for all HTTP requests.
         
@@ -65,16 +381,48 @@ class RetryKeywords:
             backoff_max: Maximum backoff time in seconds (default: 120.0)
             retry_on_status: HTTP status codes to retry on, comma-separated string or list (default: "500,502,503,504,429")
             jitter: Whether to add random jitter to backoff times (default: True)
+            deadline: Maximum time in seconds spent on a request, retries and backoffs included (default: no limit)
+            retry_budget: Maximum ratio of retries to requests in the budget window, e.g. 0.2 (default: no budget)
+            budget_window: Duration in seconds of the sliding window of the retry budget (default: 60.0)
+            budget_min_retries: Retries always allowed per window, even with few requests (default: 10)
+            respect_retry_after: Wait as long as the server asks with ``Retry-After`` or exhausted
+                                 ``RateLimit-*`` / ``X-RateLimit-*`` headers, capped by ``backoff_max``,
+                                 instead of the exponential backoff (default: True)
+            circuit_failure_rate: Failure ratio of the last requests to a host opening its circuit breaker,
+                                  e.g. 0.5 or "50%" (default: no circuit breaker)
+            circuit_window: Number of last requests to a host the failure ratio is computed on (default: 20)
+            circuit_min_requests: Requests to a host needed before its circuit can open (default: 5)
+            circuit_cooldown: Seconds an open circuit fails fast before letting a trial request through (default: 30.0)
+        
+        With a retry budget, retries of all the sessions without their own configuration
+        are counted together. Once the budget is used, failed requests are not retried
+        anymore until the window slides, see `Get Retry Budget Stats`.
+        
+        With a circuit breaker, requests raising an exception or answered with a 5xx or retried
+        status count as failures of their host. Once the failure ratio is reached, the circuit of
+        the host opens: requests to it fail immediately with ``CircuitOpenError`` and are not
+        retried until the cooldown is over. Then one trial request is let through, its success
+        closes the circuit, its failure opens it for another cooldown. See `Get Circuit Breaker State`.
+        
+        The breaker guards the requests of the sessions using the configuration sent by the
+        `GET On Session` like keywords, with retry or not, `Send Requests Concurrently`,
+        `Send Multiplexed HTTP2 Requests`, `Download File On Session`, `Run Load On Session`
+        and `Wait Until Request Succeeds`. The connections opened by `Warm Up Session` are not
+        guarded.
         
         Examples:
         | Set Global Retry Configuration | max_retries=5 | backoff_factor=0.5 |
         | Set Global Retry Configuration | retry_on_status=500,502,503 | jitter=False |
+        | Set Global Retry Configuration | deadline=30 | retry_budget=0.2 |
+        | Set Global Retry Configuration | circuit_failure_rate=50% | circuit_cooldown=60 |
         """
         # Convert parameters to correct types (Robot Framework passes everything as strings)
         max_retries = int(max_retries)
         backoff_factor = float(backoff_factor)
         backoff_max = float(backoff_max)
         jitter = bool(jitter) if isinstance(jitter, bool) else str(jitter).lower() in ('true', '1', 'yes')
+        respect_retry_after = respect_retry_after if isinstance(respect_retry_after, bool) \
+            else str(respect_retry_after).lower() in ('true', '1', 'yes')
         
         if isinstance(retry_on_status, str):
             retry_on_status = [int(code.strip()) for code in retry_on_status.split(',')]
@@ -84,11 +432,18 @@ class RetryKeywords:
             backoff_factor=backoff_factor,
             backoff_max=backoff_max,
             retry_on_status=retry_on_status,
-            jitter=jitter
+            jitter=jitter,
+            deadline=self._parse_deadline(deadline),
+            budget=self._create_retry_budget(retry_budget, budget_window, budget_min_retries),
+            respect_retry_after=respect_retry_after,
+            circuit_breaker=self._create_circuit_breaker(
+                circuit_failure_rate, circuit_window, circuit_min_requests, circuit_cooldown)
         )
         
         logger.info(f"Global retry configuration set: max_retries={max_retries}, "
-                   f"backoff_factor={backoff_factor}, retry_on_status={retry_on_status}")
+                   f"backoff_factor={backoff_factor}, retry_on_status={retry_on_status}, "
+                   f"deadline={deadline}, retry_budget={retry_budget}, "
+                   f"circuit_failure_rate={circuit_failure_rate}")
     
     @keyword("Set Session Retry Configuration")
     def set_session_retry_configuration(self, 
@@ -97,7 +452,16 @@ class RetryKeywords:
                                       backoff_factor: float = 0.3,
                                       backoff_max: float = 120.0,
                                       retry_on_status: Union[str, List[int]] = "500,502,503,504,429",
-                                      jitter: bool = True):
+                                      jitter: bool = True,
+                                      deadline: Optional[float] = None,
+                                      retry_budget: Optional[float] = None,
+                                      budget_window: float = 60.0,
+                                      budget_min_retries: int = 10,
+                                      respect_retry_after: bool = True,
+                                      circuit_failure_rate: Optional[float] = None,
+                                      circuit_window: int = 20,
+                                      circuit_min_requests: int = 5,
+                                      circuit_cooldown: float = 30.0):
         """
         Sets retry configuration for a specific session.
         
@@ -108,16 +472,32 @@ class RetryKeywords:
             backoff_max: Maximum backoff time in seconds (default: 120.0)
             retry_on_status: HTTP status codes to retry on, comma-separated string or list (default: "500,502,503,504,429")
             jitter: Whether to add random jitter to backoff times (default: True)
+            deadline: Maximum time in seconds spent on a request, retries and backoffs included (default: no limit)
+            retry_budget: Maximum ratio of retries to requests of the session in the budget window (default: no budget)
+            budget_window: Duration in seconds of the sliding window of the retry budget (default: 60.0)
+            budget_min_retries: Retries always allowed per window, even with few requests (default: 10)
+            respect_retry_after: Wait as long as the server asks with ``Retry-After`` or exhausted
+                                 ``RateLimit-*`` / ``X-RateLimit-*`` headers, capped by ``backoff_max``,
+                                 instead of the exponential backoff (default: True)
+            circuit_failure_rate: Failure ratio of the last requests to a host opening its circuit breaker,
+                                  e.g. 0.5 or "50%" (default: no circuit breaker)
+            circuit_window: Number of last requests to a host the failure ratio is computed on (default: 20)
+            circuit_min_requests: Requests to a host needed before its circuit can open (default: 5)
+            circuit_cooldown: Seconds an open circuit fails fast before letting a trial request through (default: 30.0)
         
         Examples:
         | Set Session Retry Configuration | my_session | max_retries=5 |
         | Set Session Retry Configuration | api_session | retry_on_status=429,503 | backoff_factor=1.0 |
+        | Set Session Retry Configuration | api_session | deadline=10 | retry_budget=0.1 | budget_window=30 |
+        | Set Session Retry Configuration | api_session | circuit_failure_rate=0.5 | circuit_window=10 |
         """
         # Convert parameters to correct types (Robot Framework passes everything as strings)
         max_retries = int(max_retries)
         backoff_factor = float(backoff_factor)
         backoff_max = float(backoff_max)
         jitter = bool(jitter) if isinstance(jitter, bool) else str(jitter).lower() in ('true', '1', 'yes')
+        respect_retry_after = respect_retry_after if isinstance(respect_retry_after, bool) \
+            else str(respect_retry_after).lower() in ('true', '1', 'yes')
         
         if isinstance(retry_on_status, str):
             retry_on_status = [int(code.strip()) for code in retry_on_status.split(',')]
@@ -127,11 +507,18 @@ class RetryKeywords:
             backoff_factor=backoff_factor,
             backoff_max=backoff_max,
             retry_on_status=retry_on_status,
-            jitter=jitter
+            jitter=jitter,
+            deadline=self._parse_deadline(deadline),
+            budget=self._create_retry_budget(retry_budget, budget_window, budget_min_retries),
+            respect_retry_after=respect_retry_after,
+            circuit_breaker=self._create_circuit_breaker(
+                circuit_failure_rate, circuit_window, circuit_min_requests, circuit_cooldown)
         )
         
         logger.info(f"Session '{alias}' retry configuration set: max_retries={max_retries}, "
-                   f"backoff_factor={backoff_factor}, retry_on_status={retry_on_status}")
+                   f"backoff_factor={backoff_factor}, retry_on_status={retry_on_status}, "
+                   f"deadline={deadline}, retry_budget={retry_budget}, "
+                   f"circuit_failure_rate={circuit_failure_rate}")
     
     @keyword("Get Retry Configuration")
     def get_retry_configuration(self, alias: Optional[str] = None) -> dict:
@@ -158,9 +545,88 @@ class RetryKeywords:
             'backoff_factor': config.backoff_factor,
             'backoff_max': config.backoff_max,
             'retry_on_status': config.retry_on_status,
-            'jitter': config.jitter
+            'jitter': config.jitter,
+            'deadline': config.deadline,
+            'retry_budget': config.budget.ratio if config.budget else None,
+            'respect_retry_after': config.respect_retry_after,
+            'circuit_failure_rate': config.circuit_breaker.failure_rate if config.circuit_breaker else None
         }
     
+    @keyword("Get Retry Budget Stats")
+    def get_retry_budget_stats(self, alias: Optional[str] = None) -> dict:
+        """
+        Gets the statistics of the retry budget of a session or of the global configuration.
+        
+        Args:
+            alias: Session alias name. If None, returns the global budget statistics.
+        
+        Returns:
+            Dictionary with the budget ``ratio``, ``window`` and ``min_retries``, the ``requests``
+            and ``retries`` in the current window, the ``total_requests`` and ``total_retries``,
+            the number of ``rejected_retries`` refused by the budget and ``last_rejected``,
+            the time of the last refused retry.
+        
+        Examples:
+        | ${stats}= | Get Retry Budget Stats | my_session |
+        | Should Be Equal As Integers | ${stats}[rejected_retries] | 0 |
+        """
+        config = self._get_retry_config(alias)
+        if config.budget is None:
+            raise RuntimeError("No retry budget configured" + (f" for session '{alias}'" if alias else ""))
+        stats = config.budget.stats
+        logger.info(f"Retry budget stats: {stats}")
+        return stats
+    
+    @keyword("Get Circuit Breaker State")
+    def get_circuit_breaker_state(self, alias: Optional[str] = None, host: Optional[str] = None) -> dict:
+        """
+        Gets the state of the circuit breaker of a session or of the global configuration.
+        
+        Args:
+            alias: Session alias name. If None, returns the state of the global circuit breaker.
+            host: Host, with its port if not the default one, as in ``api.example.com:8443``.
+                  If None, returns the state of all the hosts requested so far.
+        
+        Returns:
+            Dictionary with the circuit ``state`` (``closed``, ``open`` or ``half-open``), the
+            ``requests`` and ``failures`` in the window and their ``failure_rate``, the number of
+            ``times_opened``, the ``rejected_requests`` that failed fast and ``retry_in``, the
+            seconds before an open circuit lets a trial request through. Without ``host``,
+            a dictionary of these per host.
+        
+        Examples:
+        | ${state}= | Get Circuit Breaker State | my_session | host=api.example.com |
+        | Should Be Equal | ${state}[state] | closed |
+        """
+        breaker = self._get_circuit_breaker(alias)
+        if host is not None:
+            state = breaker.state(host)
+        else:
+            state = {name: breaker.state(name) for name in breaker.hosts}
+        logger.info(f"Circuit breaker state: {state}")
+        return state
+    
+    @keyword("Reset Circuit Breaker")
+    def reset_circuit_breaker(self, alias: Optional[str] = None, host: Optional[str] = None):
+        """
+        Closes the circuit of a host, or of all the hosts, and forgets their failures.
+        
+        Args:
+            alias: Session alias name. If None, resets the global circuit breaker.
+            host: Host to reset. If None, resets all the hosts.
+        
+        Examples:
+        | Reset Circuit Breaker | my_session |
+        | Reset Circuit Breaker | host=api.example.com |
+        """
+        self._get_circuit_breaker(alias).reset(host)
+    
+    def _get_circuit_breaker(self, alias: Optional[str] = None) -> CircuitBreaker:
+        config = self._get_retry_config(alias)
+        if config.circuit_breaker is None:
+            raise RuntimeError("No circuit breaker configured" + (f" for session '{alias}'" if alias else ""))
+        return config.circuit_breaker
+    
     @keyword("Clear Session Retry Configuration")
     def clear_session_retry_configuration(self, alias: str):
         """
@@ -178,6 +644,35 @@ class RetryKeywords:
         else:
             logger.warn(f"No retry configuration found for session '{alias}'")
     
+    @staticmethod
+    def _parse_deadline(deadline) -> Optional[float]:
+        if deadline is None or str(deadline).lower() in ('', 'none'):
+            return None
+        deadline = float(deadline)
+        if deadline <= 0:
+            raise ValueError(f"Retry deadline must be greater than 0, got {deadline}")
+        return deadline
+    
+    @staticmethod
+    def _parse_ratio(ratio) -> Optional[float]:
+        """Parse a ratio given as a number or a percentage, None when not set"""
+        if ratio is None or str(ratio).lower() in ('', 'none'):
+            return None
+        ratio = str(ratio).strip()
+        return float(ratio[:-1]) / 100 if ratio.endswith('%') else float(ratio)
+    
+    def _create_retry_budget(self, retry_budget, budget_window, budget_min_retries) -> Optional[RetryBudget]:
+        ratio = self._parse_ratio(retry_budget)
+        if ratio is None:
+            return None
+        return RetryBudget(ratio, float(budget_window), int(budget_min_retries))
+    
+    def _create_circuit_breaker(self, failure_rate, window, min_requests, cooldown) -> Optional[CircuitBreaker]:
+        failure_rate = self._parse_ratio(failure_rate)
+        if failure_rate is None:
+            return None
+        return CircuitBreaker(failure_rate, int(window), int(min_requests), float(cooldown))
+    
     def _get_retry_config(self, alias: Optional[str] = None) -> RetryConfig:
         """Get retry configuration for session or global"""
         if alias and alias in self.session_retry_configs:
@@ -187,13 +682,18 @@ class RetryKeywords:
     def _execute_with_retry(self, 
                            request_func: Callable,
                            retry_config: RetryConfig,
-                           *args, **kwargs) -> Response:
+                           *args,
+                           circuit_host: str = '',
+                           session_timeout=None,
+                           **kwargs) -> Response:
         """
         Execute HTTP request with retry logic
         
         Args:
             request_func: Function to execute (e.g., session.get)
             retry_config: Retry configuration to use
+            circuit_host: Host of the request, for the circuit breaker of the configuration
+            session_timeout: Timeout of the session, capped by the time left before the deadline
             *args, **kwargs: Arguments to pass to request_func
         
         Returns:
@@ -201,56 +701,127 @@ class RetryKeywords:
         """
         last_exception = None
         last_response = None
+        started = time.monotonic()
+        if retry_config.budget is not None:
+            retry_config.budget.record_request()
         
         for attempt in range(retry_config.max_retries + 1):
-            try:
-                response = request_func(*args, **kwargs)
-                
-                # Check if we should retry based on status code
-                if retry_config.should_retry_status(response.status_code):
-                    last_response = response
-                    if attempt < retry_config.max_retries:
-                        backoff_time = retry_config.get_backoff_time(attempt)
-                        logger.warn(f"Request failed with status {response.status_code}, "
-                                   f"retrying in {backoff_time:.2f} seconds (attempt {attempt + 1}/{retry_config.max_retries + 1})")
-                        time.sleep(backoff_time)
-                        continue
-                    else:
-                        logger.warn(f"Request failed with status {response.status_code}, "
-                                   f"max retries ({retry_config.max_retries}) exceeded")
-                        return response
-                
-                # Success case
+            if attempt > 0 and not self._circuit_closed(retry_config, circuit_host):
+                # the circuit opened during the backoff, give up with the last failure
+                logger.warn(f"Circuit breaker open for '{circuit_host}', not retried")
+                break
+            attempt_kwargs = self._attempt_kwargs(retry_config, started, session_timeout, kwargs)
+            response, exception = self._send_attempt(request_func, retry_config, circuit_host, args, attempt_kwargs)
+            if exception is None and not retry_config.should_retry_status(response.status_code):
                 if attempt > 0:
                     logger.info(f"Request succeeded on attempt {attempt + 1}")
                 return response
-                
-            except Exception as e:
-                last_exception = e
-                
-                # Check if we should retry based on exception type
-                if retry_config.should_retry_exception(e):
-                    if attempt < retry_config.max_retries:
-                        backoff_time = retry_config.get_backoff_time(attempt)
-                        logger.warn(f"Request failed with {type(e).__name__}: {str(e)}, "
-                                   f"retrying in {backoff_time:.2f} seconds (attempt {attempt + 1}/{retry_config.max_retries + 1})")
-                        time.sleep(backoff_time)
-                        continue
-                    else:
-                        logger.warn(f"Request failed with {type(e).__name__}: {str(e)}, "
-                                   f"max retries ({retry_config.max_retries}) exceeded")
-                        raise e
-                else:
-                    # Don't retry for this exception type
-                    raise e
+            last_exception, last_response = exception, response
+            backoff_time = self._backoff_before_retry(
+                retry_config, attempt, started, circuit_host, self._describe_failure(response, exception), response)
+            if backoff_time is None:
+                break
+            time.sleep(backoff_time)
         
-        # This should not be reached, but just in case
         if last_exception:
             raise last_exception
-        if last_response:
-            return last_response
-        
-        raise RuntimeError("Unexpected error in retry logic")
+        return last_response
+    
+    @staticmethod
+    def _circuit_closed(retry_config: RetryConfig, circuit_host: str) -> bool:
+        breaker = retry_config.circuit_breaker
+        return breaker is None or breaker.is_closed(circuit_host)
+    
+    @staticmethod
+    def _send_attempt(request_func: Callable, retry_config: RetryConfig, circuit_host: str,
+                      args: tuple, kwargs: dict) -> tuple:
+        """
+        Send one attempt of the request, through the circuit breaker of the configuration if any.
+        Return the response and None, or None and the exception when it is retryable, other
+        exceptions are raised.
+        """
+        breaker = retry_config.circuit_breaker
+        try:
+            if breaker is None:
+                return request_func(*args, **kwargs), None
+            return breaker.call(circuit_host, lambda: request_func(*args, **kwargs),
+                                retry_config.is_failure_status), None
+        except Exception as e:
+            if not retry_config.should_retry_exception(e):
+                raise
+            return None, e
+    
+    @staticmethod
+    def _describe_failure(response: Optional[Response], exception: Optional[Exception]) -> str:
+        if exception is not None:
+            return f"with {type(exception).__name__}: {str(exception)}"
+        return f"with status {response.status_code}"
+    
+    @staticmethod
+    def _attempt_kwargs(retry_config: RetryConfig, started: float, session_timeout, kwargs: dict) -> dict:
+        """
+        Request arguments of the next attempt, with a deadline its timeouts are capped
+        by the time left so that a single attempt cannot run past the deadline
+        """
+        if retry_config.deadline is None:
+            return kwargs
+        remaining = max(retry_config.deadline - (time.monotonic() - started), 0.0)
+        timeout = httpx.Timeout(kwargs.get('timeout', session_timeout))
+        capped = {name: remaining if value is None else min(value, remaining)
+                  for name, value in timeout.as_dict().items()}
+        return dict(kwargs, timeout=httpx.Timeout(**capped))
+    
+    def _backoff_before_retry(self, retry_config: RetryConfig, attempt: int, started: float, circuit_host: str,
+                              failure: str, response: Optional[Response] = None) -> Optional[float]:
+        """Return the time to wait before retrying a failed attempt, None when it is not retried"""
+        if attempt >= retry_config.max_retries:
+            logger.warn(f"Request failed {failure}, max retries ({retry_config.max_retries}) exceeded")
+            return None
+        backoff_time = retry_config.get_backoff_time(attempt, response)
+        refusal = self._refuse_retry(retry_config, started, backoff_time, circuit_host)
+        if refusal:
+            logger.warn(f"Request failed {failure}, not retried: {refusal}")
+            return None
+        logger.warn(f"Request failed {failure}, retrying in {backoff_time:.2f} seconds "
+                    f"(attempt {attempt + 1}/{retry_config.max_retries + 1})")
+        return backoff_time
+    
+    @staticmethod
+    def _refuse_retry(retry_config: RetryConfig, started: float, backoff_time: float,
+                      circuit_host: str = '') -> Optional[str]:
+        """Return why the next retry is not allowed by the circuit breaker, the deadline or the retry budget"""
+        breaker = retry_config.circuit_breaker
+        if breaker is not None and not breaker.is_closed(circuit_host):
+            return f"circuit breaker open for '{circuit_host}'"
+        if retry_config.deadline is not None:
+            elapsed = time.monotonic() - started
+            if elapsed + backoff_time >= retry_config.deadline:
+                return (f"deadline of {retry_config.deadline} seconds would be exceeded "
+                        f"({elapsed:.2f} seconds elapsed, backoff {backoff_time:.2f} seconds)")
+        if retry_config.budget is not None and not retry_config.budget.acquire_retry():
+            return (f"retry budget exhausted ({retry_config.budget.ratio:.0%} of the requests "
+                    f"in {retry_config.budget.window} seconds)")
+        return None
+    
+    @staticmethod
+    def _circuit_host(url: str) -> str:
+        """Host of ``url`` the circuit breaker counts the failures of, with its port"""
+        return httpx.URL(url).netloc.decode('ascii')
+    
+    def _call_with_circuit_breaker(self, alias: str, url: str, send: Callable):
+        """Send a request to ``url`` with ``send`` through the circuit breaker of session ``alias``, if any"""
+        retry_config = self._get_retry_config(alias)
+        if retry_config.circuit_breaker is None:
+            return send()
+        return retry_config.circuit_breaker.call(self._circuit_host(url), send, retry_config.is_failure_status)
+    
+    async def _call_with_circuit_breaker_async(self, alias: str, url: str, send: Callable):
+        """Awaitable version of `_call_with_circuit_breaker` for a ``send`` returning a coroutine"""
+        retry_config = self._get_retry_config(alias)
+        if retry_config.circuit_breaker is None:
+            return await send()
+        return await retry_config.circuit_breaker.call_async(self._circuit_host(url), send,
+                                                             retry_config.is_failure_status)
     
     @keyword("Retry Request On Session")
     def retry_request_on_session(self, 
@@ -262,6 +833,7 @@ class RetryKeywords:
                                 retry_on_status: Optional[Union[str, List[int]]] = None,
                                 expected_status=None,
                                 msg=None,
+                                deadline: Optional[float] = None,
                                 **kwargs) -> Response:
         """
         Performs HTTP request with custom retry logic on a session.
@@ -275,6 +847,7 @@ class RetryKeywords:
             retry_on_status: Override retry status codes for this request
             expected_status: Expected HTTP status code
             msg: Custom error message
+            deadline: Override the maximum time in seconds spent on this request, retries included
             **kwargs: Additional request parameters
         
         Returns:
@@ -282,6 +855,7 @@ class RetryKeywords:
         
         Examples:
         | ${response}= | Retry Request On Session | my_session | GET | /api/data |
+        | ${response}= | Retry Request On Session | my_session | GET | /api/slow | deadline=30 |
         | ${response}= | Retry Request On Session | my_session | POST | /api/submit | max_retries=5 |
         | ${response}= | Retry Request On Session | my_session | GET | /api/flaky | retry_on_status=500,503 |
         """
@@ -295,7 +869,11 @@ class RetryKeywords:
             backoff_max=base_config.backoff_max,
             retry_on_status=base_config.retry_on_status.copy(),
             retry_on_exceptions=base_config.retry_on_exceptions.copy(),
-            jitter=base_config.jitter
+            jitter=base_config.jitter,
+            deadline=base_config.deadline,
+            budget=base_config.budget,
+            respect_retry_after=base_config.respect_retry_after,
+            circuit_breaker=base_config.circuit_breaker
         )
         
         # Override with request-specific parameters (convert types as needed)
@@ -303,6 +881,8 @@ class RetryKeywords:
             retry_config.max_retries = int(max_retries)
         if backoff_factor is not None:
             retry_config.backoff_factor = float(backoff_factor)
+        if deadline is not None:
+            retry_config.deadline = self._parse_deadline(deadline)
         if retry_on_status is not None:
             if isinstance(retry_on_status, str):
                 retry_config.retry_on_status = [int(code.strip()) for code in retry_on_status.split(',')]
@@ -310,13 +890,22 @@ class RetryKeywords:
                 retry_config.retry_on_status = retry_on_status
         
         # Get the method function from session
-        method_func = getattr(session, method.lower())
+        method_func = self._get_method_function(session, method.lower())
+        
+        def request_with_logging(*args, **kwargs):
+            response = method_func(*args, **kwargs)
+            session.last_resp = response
+            self._log_exchange(session, response)
+            return response
         
         # Execute with retry
+        request_url = self._get_url(session, url)
         response = self._execute_with_retry(
-            method_func,
+            request_with_logging,
             retry_config,
-            self._get_url(session, url),
+            request_url,
+            circuit_host=self._circuit_host(request_url),
+            session_timeout=session.timeout,
             **kwargs
         )
         
@@ -361,7 +950,8 @@ class RetryKeywords:
             expected_status = int(expected_status)
         
         session = self._cache.switch(alias)
-        method_func = getattr(session, method.lower())
+        method_func = self._get_method_function(session, method.lower())
+        request_url = self._get_url(session, url)
         
         start_time = time.time()
         attempt = 0
@@ -369,7 +959,8 @@ class RetryKeywords:
         while time.time() - start_time < timeout:
             attempt += 1
             try:
-                response = method_func(self._get_url(session, url), **kwargs)
+                response = self._call_with_circuit_breaker(alias, request_url,
+                                                           lambda: method_func(request_url, **kwargs))
                 
                 # Check if status matches expected
                 if isinstance(expected_status, int):
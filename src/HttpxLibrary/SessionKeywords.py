@@ -1,34 +1,41 @@
+import asyncio
 import logging
-import sys
+import time
+from contextlib import AsyncExitStack, ExitStack
+from concurrent.futures import ThreadPoolExecutor
 
 import httpx
-from httpx import Client, HTTPTransport, Response
+from httpx import AsyncClient, AsyncHTTPTransport, Client, HTTPTransport, Response
 # noinspection PyProtectedMember
 from httpx._config import DEFAULT_LIMITS, DEFAULT_MAX_REDIRECTS, DEFAULT_TIMEOUT_CONFIG
 from robot.api import logger
 from robot.api.deco import keyword
 from robot.utils.asserts import assert_equal
 
-from HttpxLibrary import utils, log
-from HttpxLibrary.compat import httplib
+from HttpxLibrary import jsoncodec, log, ratelimit, resolver, sslcontext, tracing, utils
 from HttpxLibrary.exceptions import InvalidResponse, InvalidExpectedStatus
-from HttpxLibrary.utils import is_file_descriptor, is_string_type
+from HttpxLibrary.sessions import SessionRecord, SessionRegistry
+from HttpxLibrary.transports import SharedTransports
+from HttpxLibrary.utils import DownloadResponse, is_file_descriptor, is_string_type
 from .HttpxKeywords import HttpxKeywords
+from .LoadKeywords import LoadKeywords
 from .RetryKeywords import RetryKeywords
+from .StatisticsKeywords import StatisticsKeywords
 
-try:
-    # noinspection PyUnresolvedReferences
-    from httpx_ntlm import HttpNtlmAuth
-except ImportError:
-    pass
 
-
-class SessionKeywords(HttpxKeywords, RetryKeywords):
+class SessionKeywords(HttpxKeywords, RetryKeywords, LoadKeywords, StatisticsKeywords):
     DEFAULT_RETRIES = 3
+    ROBOT_LISTENER_API_VERSION = 3
 
     def __init__(self):
         HttpxKeywords.__init__(self)
         RetryKeywords.__init__(self)
+        # library listener, Robot Framework calls _close when the library goes out of scope
+        self.ROBOT_LIBRARY_LISTENER = self
+        self._event_loop = None
+        self._sessions = SessionRegistry()
+        self._shared_transports = SharedTransports()
+        self._resolver = None
 
     def _create_session(
             self,
@@ -45,11 +52,16 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             http1=True,
             http2=False,
             limits=DEFAULT_LIMITS,
+            log_policy='truncated',
             max_redirects=DEFAULT_MAX_REDIRECTS,
             params=None,
+            rate_limit=None,
+            rate_limit_burst=1,
             retries=DEFAULT_RETRIES,
+            shared_pool=False,
             timeout=DEFAULT_TIMEOUT_CONFIG,
-            verify=False
+            verify=False,
+            asynchronous=False
     ) -> httpx.Client:
 
         if params is None:
@@ -70,32 +82,46 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
                     f'- http1={http1}\n'
                     f'- http2={http2}\n'
                     f'- limits={limits}\n'
+                    f'- log_policy={log_policy}\n'
                     f'- max_redirects={max_redirects}\n'
                     f'- params={params}\n'
+                    f'- rate_limit={rate_limit}\n'
+                    f'- rate_limit_burst={rate_limit_burst}\n'
                     f'- retries={retries}\n'
+                    f'- shared_pool={shared_pool}\n'
                     f'- timeout={timeout}\n'
                     f'- verify={verify}\n'
+                    f'- asynchronous={asynchronous}\n'
                     )
 
+        rate_limiter = ratelimit.TokenBucket(rate_limit, rate_limit_burst) if rate_limit is not None else None
+        client_class, transport_class = (AsyncClient, AsyncHTTPTransport) if asynchronous \
+            else (Client, HTTPTransport)
+
+        # the same context serves the client and the transport, and all the sessions
+        # with the same verify, cert, http1 and http2 settings
+        ssl_context = sslcontext.get_ssl_context(verify, cert, http1, http2)
         transport = None
+        if shared_pool:
+            transport, reused = self._shared_transports.get(asynchronous, ssl_context, http1, http2, limits, retries)
+            if reused:
+                logger.info('Reusing shared connection pool')
         # Retries parameter not supported directly by Client()
-        if retries is not None and retries > 0:
-            transport = HTTPTransport(
-                verify=verify,
-                cert=cert,
+        elif retries is not None and retries > 0:
+            transport = transport_class(
+                verify=ssl_context,
                 http1=http1,
                 http2=http2,
                 limits=limits,
                 retries=retries
             )
 
-        s = session = Client(
+        s = session = client_class(
             auth=auth,
             params=params,
             headers=headers,
             cookies=cookies,
-            verify=verify,
-            cert=cert,
+            verify=ssl_context,
             http1=http1,
             http2=http2,
             timeout=timeout,
@@ -115,13 +141,17 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             httpx_log.propagate = True
 
         s.url = url
-
-        # Enable http verbosity
-        if int(debug) >= 1:
-            self.debug = int(debug)
-            httplib.HTTPConnection.debuglevel = self.debug
+        record = SessionRecord(alias, session, url, log.LogPolicy(log_policy), limits=limits)
+        record.rate_limiter = rate_limiter
+        hooks = tracing.event_hooks(record, asynchronous)
+        hooks['request'].insert(0, ratelimit.pace_requests_hook(record, asynchronous))
+        session.event_hooks = hooks
+        if self._resolver is not None:
+            self._use_resolver(record, self._resolver)
+        record.debug = int(debug)
 
         self._cache.register(session, alias=alias)
+        self._sessions.register(record)
         return session
 
     @keyword("Create Session")
@@ -140,9 +170,13 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             http1=True,
             http2=False,
             limits=DEFAULT_LIMITS,
+            log_policy='truncated',
             max_redirects=DEFAULT_MAX_REDIRECTS,
             params=None,
+            rate_limit=None,
+            rate_limit_burst=1,
             retries=DEFAULT_RETRIES,
+            shared_pool=False,
             timeout=DEFAULT_TIMEOUT_CONFIG,
             verify=False
     ):
@@ -164,8 +198,9 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         ``cookies`` Dictionary of Cookie items to include when sending requests.
                     See httpx.Client()
 
-        ``debug`` Enable http verbosity option more information
-                  https://docs.python.org/2/library/httplib.html#httplib.HTTPConnection.set_debuglevel
+        ``debug`` With a value of 1 or more, record a wire trace of each request (connection,
+                  TLS handshake, request and response headers with their timing), logged at
+                  DEBUG level and available as ``${response.wire_trace}``
 
         ``disable_warnings`` Disable httpx warning useful when you have large number of testcases
 
@@ -181,6 +216,13 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         ``limits`` The limits configuration to use.
                    See httpx.Client()
 
+        ``log_policy`` How much of each request and response is logged: ``off``, ``headers``
+                       (no body), ``truncated`` (default, body cut at 10000 bytes below DEBUG level),
+                       ``full``, ``artifacts`` (bodies saved to files linked from the log)
+                       or ``sampled:N`` (one exchange out of N logged truncated).
+                       Responses with a 4xx or 5xx status are always logged in full.
+                       See `Set Session Log Policy`.
+
         ``max_redirects`` The maximum number of redirect responses that should be followed.
                           See httpx.Client()
 
@@ -188,11 +230,25 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
                    a string, dictionary, or sequence of two-tuples.
                    See httpx.Client()
 
+        ``rate_limit`` Maximum rate of the requests sent by the session, in requests per second
+                       or as ``600/min`` or ``1000/h``. Requests over the rate wait for their turn
+                       before leaving the client, see `Set Session Rate Limit`.
+
+        ``rate_limit_burst`` Number of requests the rate limit lets through without waiting
+                             after an idle period, 1 by default
+
         ``retries`` Number of maximum retries each connection should attempt.
                         By default it will retry 3 times in case of connection errors only.
                         A 0 value will disable any kind of retries regardless of other retry settings.
                         In case the number of retries is reached a retry exception is raised.
 
+        ``shared_pool`` Share the connection pool with the other sessions created with
+                        ``shared_pool=True`` and the same ``verify``, ``cert``, ``http1``,
+                        ``http2``, ``limits`` and ``retries``. Headers, cookies and authentication
+                        stay per session. The pool survives `Delete All Sessions`, so sessions
+                        recreated in every Suite Setup reuse open connections and TLS sessions.
+                        See `Close Shared Connection Pools`.
+
         ``timeout`` The timeout configuration to use when sending requests.
                     See httpx.Client()
 
@@ -225,10 +281,158 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             http2=http2,
             timeout=timeout,
             limits=limits,
+            log_policy=log_policy,
             max_redirects=max_redirects,
             debug=debug,
             disable_warnings=disable_warnings,
-            retries=retries
+            retries=retries,
+            shared_pool=shared_pool,
+            rate_limit=rate_limit,
+            rate_limit_burst=rate_limit_burst
+        )
+
+    @keyword("Create Async Session")
+    def create_async_session(
+            self,
+            alias,
+            url,
+            *,
+            # optional named args
+            auth=None,
+            cert=None,
+            cookies=None,
+            debug=0,
+            disable_warnings=0,
+            headers=None,
+            http1=True,
+            http2=False,
+            limits=DEFAULT_LIMITS,
+            log_policy='truncated',
+            max_redirects=DEFAULT_MAX_REDIRECTS,
+            params=None,
+            rate_limit=None,
+            rate_limit_burst=1,
+            retries=DEFAULT_RETRIES,
+            shared_pool=False,
+            timeout=DEFAULT_TIMEOUT_CONFIG,
+            verify=False
+    ):
+        """ Create Async Session: create a HTTP session to a server backed by an asynchronous client
+
+        The session is backed by an ``httpx.AsyncClient`` driven by an event loop
+        owned by the library. All the `* On Session` keywords can be used on it
+        exactly as on a session created with `Create Session`. The client is closed
+        on that loop by `Delete All Sessions`, and the loop once no asynchronous
+        session is left.
+
+        ``alias`` Robot Framework alias to identify the session
+
+        ``url`` Base url of the server
+
+        ``auth`` Username and password pair or None for Basic Authentication
+                 to use when sending requests.
+                 See httpx.BasicAuth()
+
+        ``cert`` An SSL certificate used by the requested host to authenticate the client.
+                 Either a path to an SSL certificate file, or two-tuple of (certificate file,
+                 key file), or a three-tuple of (certificate file, key file, password).
+                 See httpx.Client()
+
+        ``cookies`` Dictionary of Cookie items to include when sending requests.
+                    See httpx.Client()
+
+        ``debug`` With a value of 1 or more, record a wire trace of each request (connection,
+                  TLS handshake, request and response headers with their timing), logged at
+                  DEBUG level and available as ``${response.wire_trace}``
+
+        ``disable_warnings`` Disable httpx warning useful when you have large number of testcases
+
+        ``headers`` Dictionary of HTTP headers to include when sending requests.
+                    See httpx.Client()
+
+        ``http1`` Switch to enable/disable HTTP/1.1 support
+                  See httpx.Client()
+
+        ``http2`` Switch to enable/disable HTTP/2 support
+                  See httpx.Client()
+
+        ``limits`` The limits configuration to use.
+                   See httpx.Client()
+
+        ``log_policy`` How much of each request and response is logged: ``off``, ``headers``
+                       (no body), ``truncated`` (default, body cut at 10000 bytes below DEBUG level),
+                       ``full``, ``artifacts`` (bodies saved to files linked from the log)
+                       or ``sampled:N`` (one exchange out of N logged truncated).
+                       Responses with a 4xx or 5xx status are always logged in full.
+                       See `Set Session Log Policy`.
+
+        ``max_redirects`` The maximum number of redirect responses that should be followed.
+                          See httpx.Client()
+
+        ``params`` Query parameters to include in request URLs, as
+                   a string, dictionary, or sequence of two-tuples.
+                   See httpx.Client()
+
+        ``rate_limit`` Maximum rate of the requests sent by the session, in requests per second
+                       or as ``600/min`` or ``1000/h``. Requests over the rate wait for their turn
+                       before leaving the client, see `Set Session Rate Limit`.
+
+        ``rate_limit_burst`` Number of requests the rate limit lets through without waiting
+                             after an idle period, 1 by default
+
+        ``retries`` Number of maximum retries each connection should attempt.
+                        By default it will retry 3 times in case of connection errors only.
+                        A 0 value will disable any kind of retries regardless of other retry settings.
+                        In case the number of retries is reached a retry exception is raised.
+
+        ``shared_pool`` Share the connection pool with the other sessions created with
+                        ``shared_pool=True`` and the same ``verify``, ``cert``, ``http1``,
+                        ``http2``, ``limits`` and ``retries``. Headers, cookies and authentication
+                        stay per session. The pool survives `Delete All Sessions`, so sessions
+                        recreated in every Suite Setup reuse open connections and TLS sessions.
+                        See `Close Shared Connection Pools`.
+
+        ``timeout`` The timeout configuration to use when sending requests.
+                    See httpx.Client()
+
+        ``verify`` SSL certificates (a.k.a CA bundle) used to verify the identity
+                   of requested hosts. Either `True` (default CA bundle),
+                   a path to an SSL certificate file, or `False` (disable verification).
+                   See httpx.Client()
+        """
+        if params is None:
+            params = {}
+        if headers is None:
+            headers = {}
+        if cookies is None:
+            cookies = {}
+        if auth is not None:
+            auth = httpx.BasicAuth(*auth)
+
+        logger.info('Create Async Session with Basic Authentication')
+
+        return self._create_session(
+            alias,
+            url,
+            auth=auth,
+            params=params,
+            headers=headers,
+            cookies=cookies,
+            verify=verify,
+            cert=cert,
+            http1=http1,
+            http2=http2,
+            timeout=timeout,
+            limits=limits,
+            log_policy=log_policy,
+            max_redirects=max_redirects,
+            debug=debug,
+            disable_warnings=disable_warnings,
+            retries=retries,
+            shared_pool=shared_pool,
+            rate_limit=rate_limit,
+            rate_limit_burst=rate_limit_burst,
+            asynchronous=True
         )
 
     @keyword("Create HTTP2 Session")
@@ -245,9 +449,13 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             disable_warnings=0,
             headers=None,
             limits=DEFAULT_LIMITS,
+            log_policy='truncated',
             max_redirects=DEFAULT_MAX_REDIRECTS,
             params=None,
+            rate_limit=None,
+            rate_limit_burst=1,
             retries=DEFAULT_RETRIES,
+            shared_pool=False,
             timeout=DEFAULT_TIMEOUT_CONFIG,
             verify=False):
         """ Create Session: create a HTTP/2 only session to a server
@@ -268,8 +476,9 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         ``cookies`` Dictionary of Cookie items to include when sending requests.
                     See httpx.Client()
 
-        ``debug`` Enable http verbosity option more information
-                  https://docs.python.org/2/library/httplib.html#httplib.HTTPConnection.set_debuglevel
+        ``debug`` With a value of 1 or more, record a wire trace of each request (connection,
+                  TLS handshake, request and response headers with their timing), logged at
+                  DEBUG level and available as ``${response.wire_trace}``
 
         ``disable_warnings`` Disable httpx warning useful when you have large number of testcases
 
@@ -279,6 +488,13 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         ``limits`` The limits configuration to use.
                    See httpx.Client()
 
+        ``log_policy`` How much of each request and response is logged: ``off``, ``headers``
+                       (no body), ``truncated`` (default, body cut at 10000 bytes below DEBUG level),
+                       ``full``, ``artifacts`` (bodies saved to files linked from the log)
+                       or ``sampled:N`` (one exchange out of N logged truncated).
+                       Responses with a 4xx or 5xx status are always logged in full.
+                       See `Set Session Log Policy`.
+
         ``max_redirects`` The maximum number of redirect responses that should be followed.
                           See httpx.Client()
 
@@ -286,11 +502,25 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
                    a string, dictionary, or sequence of two-tuples.
                    See httpx.Client()
 
+        ``rate_limit`` Maximum rate of the requests sent by the session, in requests per second
+                       or as ``600/min`` or ``1000/h``. Requests over the rate wait for their turn
+                       before leaving the client, see `Set Session Rate Limit`.
+
+        ``rate_limit_burst`` Number of requests the rate limit lets through without waiting
+                             after an idle period, 1 by default
+
         ``retries`` Number of maximum retries each connection should attempt.
                         By default it will retry 3 times in case of connection errors only.
                         A 0 value will disable any kind of retries regardless of other retry settings.
                         In case the number of retries is reached a retry exception is raised.
 
+        ``shared_pool`` Share the connection pool with the other sessions created with
+                        ``shared_pool=True`` and the same ``verify``, ``cert``, ``http1``,
+                        ``http2``, ``limits`` and ``retries``. Headers, cookies and authentication
+                        stay per session. The pool survives `Delete All Sessions`, so sessions
+                        recreated in every Suite Setup reuse open connections and TLS sessions.
+                        See `Close Shared Connection Pools`.
+
         ``timeout`` The timeout configuration to use when sending requests.
                     See httpx.Client()
 
@@ -323,10 +553,14 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             http2=True,
             timeout=timeout,
             limits=limits,
+            log_policy=log_policy,
             max_redirects=max_redirects,
             debug=debug,
             disable_warnings=disable_warnings,
-            retries=retries
+            retries=retries,
+            shared_pool=shared_pool,
+            rate_limit=rate_limit,
+            rate_limit_burst=rate_limit_burst
         )
 
     @keyword("Create Custom Session")
@@ -345,9 +579,13 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             http1=True,
             http2=False,
             limits=DEFAULT_LIMITS,
+            log_policy='truncated',
             max_redirects=DEFAULT_MAX_REDIRECTS,
             params=None,
+            rate_limit=None,
+            rate_limit_burst=1,
             retries=DEFAULT_RETRIES,
+            shared_pool=False,
             timeout=DEFAULT_TIMEOUT_CONFIG,
             verify=False):
         """ Create Session: create a HTTP session to a server
@@ -367,8 +605,9 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         ``cookies`` Dictionary of Cookie items to include when sending requests.
                     See httpx.Client()
 
-        ``debug`` Enable http verbosity option more information
-                  https://docs.python.org/2/library/httplib.html#httplib.HTTPConnection.set_debuglevel
+        ``debug`` With a value of 1 or more, record a wire trace of each request (connection,
+                  TLS handshake, request and response headers with their timing), logged at
+                  DEBUG level and available as ``${response.wire_trace}``
 
         ``disable_warnings`` Disable httpx warning useful when you have large number of testcases
 
@@ -384,6 +623,13 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         ``limits`` The limits configuration to use.
                    See httpx.Client()
 
+        ``log_policy`` How much of each request and response is logged: ``off``, ``headers``
+                       (no body), ``truncated`` (default, body cut at 10000 bytes below DEBUG level),
+                       ``full``, ``artifacts`` (bodies saved to files linked from the log)
+                       or ``sampled:N`` (one exchange out of N logged truncated).
+                       Responses with a 4xx or 5xx status are always logged in full.
+                       See `Set Session Log Policy`.
+
         ``max_redirects`` The maximum number of redirect responses that should be followed.
                           See httpx.Client()
 
@@ -391,11 +637,25 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
                    a string, dictionary, or sequence of two-tuples.
                    See httpx.Client()
 
+        ``rate_limit`` Maximum rate of the requests sent by the session, in requests per second
+                       or as ``600/min`` or ``1000/h``. Requests over the rate wait for their turn
+                       before leaving the client, see `Set Session Rate Limit`.
+
+        ``rate_limit_burst`` Number of requests the rate limit lets through without waiting
+                             after an idle period, 1 by default
+
         ``retries`` Number of maximum retries each connection should attempt.
                         By default it will retry 3 times in case of connection errors only.
                         A 0 value will disable any kind of retries regardless of other retry settings.
                         In case the number of retries is reached a retry exception is raised.
 
+        ``shared_pool`` Share the connection pool with the other sessions created with
+                        ``shared_pool=True`` and the same ``verify``, ``cert``, ``http1``,
+                        ``http2``, ``limits`` and ``retries``. Headers, cookies and authentication
+                        stay per session. The pool survives `Delete All Sessions`, so sessions
+                        recreated in every Suite Setup reuse open connections and TLS sessions.
+                        See `Close Shared Connection Pools`.
+
         ``timeout`` The timeout configuration to use when sending requests.
                     See httpx.Client()
 
@@ -424,10 +684,14 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             http2=http2,
             timeout=timeout,
             limits=limits,
+            log_policy=log_policy,
             max_redirects=max_redirects,
             debug=debug,
             disable_warnings=disable_warnings,
-            retries=retries)
+            retries=retries,
+            shared_pool=shared_pool,
+            rate_limit=rate_limit,
+            rate_limit_burst=rate_limit_burst)
 
     @keyword("Create Digest Session")
     def create_digest_session(
@@ -445,9 +709,13 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             http1=True,
             http2=False,
             limits=DEFAULT_LIMITS,
+            log_policy='truncated',
             max_redirects=DEFAULT_MAX_REDIRECTS,
             params=None,
+            rate_limit=None,
+            rate_limit_burst=1,
             retries=DEFAULT_RETRIES,
+            shared_pool=False,
             timeout=DEFAULT_TIMEOUT_CONFIG,
             verify=False):
         """ Create Session: create a HTTP session to a server
@@ -468,8 +736,9 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         ``cookies`` Dictionary of Cookie items to include when sending requests.
                     See httpx.Client()
 
-        ``debug`` Enable http verbosity option more information
-                  https://docs.python.org/2/library/httplib.html#httplib.HTTPConnection.set_debuglevel
+        ``debug`` With a value of 1 or more, record a wire trace of each request (connection,
+                  TLS handshake, request and response headers with their timing), logged at
+                  DEBUG level and available as ``${response.wire_trace}``
 
         ``disable_warnings`` Disable httpx warning useful when you have large number of testcases
 
@@ -485,6 +754,13 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         ``limits`` The limits configuration to use.
                    See httpx.Client()
 
+        ``log_policy`` How much of each request and response is logged: ``off``, ``headers``
+                       (no body), ``truncated`` (default, body cut at 10000 bytes below DEBUG level),
+                       ``full``, ``artifacts`` (bodies saved to files linked from the log)
+                       or ``sampled:N`` (one exchange out of N logged truncated).
+                       Responses with a 4xx or 5xx status are always logged in full.
+                       See `Set Session Log Policy`.
+
         ``max_redirects`` The maximum number of redirect responses that should be followed.
                           See httpx.Client()
 
@@ -492,11 +768,25 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
                    a string, dictionary, or sequence of two-tuples.
                    See httpx.Client()
 
+        ``rate_limit`` Maximum rate of the requests sent by the session, in requests per second
+                       or as ``600/min`` or ``1000/h``. Requests over the rate wait for their turn
+                       before leaving the client, see `Set Session Rate Limit`.
+
+        ``rate_limit_burst`` Number of requests the rate limit lets through without waiting
+                             after an idle period, 1 by default
+
         ``retries`` Number of maximum retries each connection should attempt.
                         By default it will retry 3 times in case of connection errors only.
                         A 0 value will disable any kind of retries regardless of other retry settings.
                         In case the number of retries is reached a retry exception is raised.
 
+        ``shared_pool`` Share the connection pool with the other sessions created with
+                        ``shared_pool=True`` and the same ``verify``, ``cert``, ``http1``,
+                        ``http2``, ``limits`` and ``retries``. Headers, cookies and authentication
+                        stay per session. The pool survives `Delete All Sessions`, so sessions
+                        recreated in every Suite Setup reuse open connections and TLS sessions.
+                        See `Close Shared Connection Pools`.
+
         ``timeout`` The timeout configuration to use when sending requests.
                     See httpx.Client()
 
@@ -529,10 +819,14 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             http2=http2,
             timeout=timeout,
             limits=limits,
+            log_policy=log_policy,
             max_redirects=max_redirects,
             debug=debug,
             disable_warnings=disable_warnings,
-            retries=retries)
+            retries=retries,
+            shared_pool=shared_pool,
+            rate_limit=rate_limit,
+            rate_limit_burst=rate_limit_burst)
 
     @keyword("Create Ntlm Session")
     def create_ntlm_session(
@@ -550,9 +844,13 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             http1=True,
             http2=False,
             limits=DEFAULT_LIMITS,
+            log_policy='truncated',
             max_redirects=DEFAULT_MAX_REDIRECTS,
             params=None,
+            rate_limit=None,
+            rate_limit_burst=1,
             retries=DEFAULT_RETRIES,
+            shared_pool=False,
             timeout=DEFAULT_TIMEOUT_CONFIG,
             verify=False):
         """ Create Session: create a HTTP session to a server
@@ -572,8 +870,9 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         ``cookies`` Dictionary of Cookie items to include when sending requests.
                     See httpx.Client()
 
-        ``debug`` Enable http verbosity option more information
-                  https://docs.python.org/2/library/httplib.html#httplib.HTTPConnection.set_debuglevel
+        ``debug`` With a value of 1 or more, record a wire trace of each request (connection,
+                  TLS handshake, request and response headers with their timing), logged at
+                  DEBUG level and available as ``${response.wire_trace}``
 
         ``disable_warnings`` Disable httpx warning useful when you have large number of testcases
 
@@ -589,6 +888,13 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         ``limits`` The limits configuration to use.
                    See httpx.Client()
 
+        ``log_policy`` How much of each request and response is logged: ``off``, ``headers``
+                       (no body), ``truncated`` (default, body cut at 10000 bytes below DEBUG level),
+                       ``full``, ``artifacts`` (bodies saved to files linked from the log)
+                       or ``sampled:N`` (one exchange out of N logged truncated).
+                       Responses with a 4xx or 5xx status are always logged in full.
+                       See `Set Session Log Policy`.
+
         ``max_redirects`` The maximum number of redirect responses that should be followed.
                           See httpx.Client()
 
@@ -596,11 +902,25 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
                    a string, dictionary, or sequence of two-tuples.
                    See httpx.Client()
 
+        ``rate_limit`` Maximum rate of the requests sent by the session, in requests per second
+                       or as ``600/min`` or ``1000/h``. Requests over the rate wait for their turn
+                       before leaving the client, see `Set Session Rate Limit`.
+
+        ``rate_limit_burst`` Number of requests the rate limit lets through without waiting
+                             after an idle period, 1 by default
+
         ``retries`` Number of maximum retries each connection should attempt.
                         By default it will retry 3 times in case of connection errors only.
                         A 0 value will disable any kind of retries regardless of other retry settings.
                         In case the number of retries is reached a retry exception is raised.
 
+        ``shared_pool`` Share the connection pool with the other sessions created with
+                        ``shared_pool=True`` and the same ``verify``, ``cert``, ``http1``,
+                        ``http2``, ``limits`` and ``retries``. Headers, cookies and authentication
+                        stay per session. The pool survives `Delete All Sessions`, so sessions
+                        recreated in every Suite Setup reuse open connections and TLS sessions.
+                        See `Close Shared Connection Pools`.
+
         ``timeout`` The timeout configuration to use when sending requests.
                     See httpx.Client()
 
@@ -616,8 +936,9 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         if params is None:
             params = {}
         try:
-            HttpNtlmAuth
-        except NameError:
+            # imported on first use, it is not needed by the other sessions
+            from httpx_ntlm import HttpNtlmAuth
+        except ImportError:
             raise AssertionError('httpx-ntlm module not installed')
         if len(auth) != 3:
             raise AssertionError('Incorrect number of authentication arguments'
@@ -640,10 +961,14 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             http2=http2,
             timeout=timeout,
             limits=limits,
+            log_policy=log_policy,
             max_redirects=max_redirects,
             debug=debug,
             disable_warnings=disable_warnings,
-            retries=retries)
+            retries=retries,
+            shared_pool=shared_pool,
+            rate_limit=rate_limit,
+            rate_limit_burst=rate_limit_burst)
 
     @keyword("Session Exists")
     def session_exists(self, alias):
@@ -662,7 +987,20 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         """ Removes all the session objects """
         logger.info('Delete All Sessions')
 
+        records = list(self._sessions)
         self._cache.empty_cache()
+        self._sessions.clear()
+        self._close_async_clients(records)
+
+    @keyword("Close Shared Connection Pools")
+    def close_shared_connection_pools(self):
+        """ Closes the connection pools shared by the sessions created with ``shared_pool=True``
+
+        Sessions still using them open new pools on their next request.
+        """
+        closed = self._shared_transports.close(self._run_coroutine)
+        self._close_event_loop()
+        logger.info(f'Closed {closed} shared connection pools')
 
     # TODO this is not covered by any tests
     @keyword("Update Session")
@@ -679,6 +1017,196 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         if cookies is not None:
             session.cookies.update(cookies)
 
+    @keyword("Set Session Log Policy")
+    def set_session_log_policy(self, alias, log_policy):
+        """Set Session Log Policy: change how much of the requests of a session is logged
+
+        ``alias`` Robot Framework alias to identify the session
+
+        ``log_policy`` One of ``off``, ``headers``, ``truncated``, ``full``, ``artifacts``
+                       or ``sampled:N``, see `Create Session`. Responses with a 4xx or 5xx
+                       status are always logged in full.
+
+        With ``artifacts`` request and response bodies are not inlined in output.xml but written
+        to ``http-bodies`` in the output directory, or to the directory given as ``artifacts:<path>``.
+        Files are named after the sha256 digest of the body, so identical payloads are stored once,
+        and the log only holds a link with the size and digest of the body.
+
+        Examples:
+        | Set Session Log Policy | my_session | headers |
+        | Set Session Log Policy | my_session | sampled:100 |
+        | Set Session Log Policy | my_session | artifacts |
+        """
+        record = self._sessions[alias]
+        record.log_policy = log.LogPolicy(log_policy)
+        logger.info(f"Session '{alias}' log policy set to {record.log_policy}")
+
+    @keyword("Set Session Rate Limit")
+    def set_session_rate_limit(self, alias, rate_limit, burst=1):
+        """Set Session Rate Limit: pace the requests of a session with a token bucket
+
+        ``alias`` Robot Framework alias to identify the session
+
+        ``rate_limit`` Maximum rate in requests per second, or as ``600/min`` or ``1000/h``.
+                       ``None`` removes the limit.
+
+        ``burst`` Number of requests sent without waiting after an idle period, 1 by default
+
+        Requests over the rate wait before leaving the client, whether they are sent one
+        after the other or concurrently by `Send Requests Concurrently`, `Run Load On Session`
+        or an asynchronous session. Redirects count as requests. The wait is not counted
+        in ``${response.elapsed}``. Pacing requests below the quota of the server avoids paying for
+        429 responses and their retries.
+
+        Examples:
+        | Set Session Rate Limit | my_session | 5 |
+        | Set Session Rate Limit | my_session | 600/min | burst=20 |
+        | Set Session Rate Limit | my_session | None |
+        """
+        record = self._sessions[alias]
+        if rate_limit is None or str(rate_limit).lower() in ('', 'none'):
+            record.rate_limiter = None
+            logger.info(f"Session '{alias}' rate limit removed")
+        else:
+            record.rate_limiter = ratelimit.TokenBucket(rate_limit, burst)
+            logger.info(f"Session '{alias}' rate limit set to {record.rate_limiter}")
+
+    @keyword("Enable DNS Cache")
+    def enable_dns_cache(self, alias=None, ttl=60, overrides=None):
+        """Enable DNS Cache: resolve host names once and reuse the addresses for new connections
+
+        ``alias`` Robot Framework alias of the session using the cache. Without alias
+                  the cache is shared by all the sessions created afterwards.
+
+        ``ttl`` Number of seconds a resolved address is kept, 60 by default
+
+        ``overrides`` Dictionary of host names and the address to connect to instead of
+                      resolving them, as the ``--resolve`` option of curl. TLS certificates
+                      are still verified against the host name.
+
+        New connections of the session then skip the system resolver while the address is
+        cached, avoiding DNS latency and spikes in load tests with connection churn.
+        The resolution time of the other connections is reported as the ``dns`` phase by
+        `Get Phase Timings`. A session with a shared connection pool (``shared_pool=True``)
+        enables the cache for all the sessions sharing the pool.
+
+        See `Get DNS Cache Stats` for the hit and miss counts.
+
+        Examples:
+        | Enable DNS Cache | ttl=300 |
+        | Create Session | api | https://api.example.com |
+        | &{overrides}= | Create Dictionary | api.example.com=127.0.0.1 |
+        | Enable DNS Cache | api | overrides=${overrides} |
+        """
+        caching_resolver = resolver.CachingResolver(ttl, overrides)
+        if alias is None:
+            self._resolver = caching_resolver
+            logger.info(f'DNS cache enabled for new sessions, ttl={caching_resolver.ttl}s')
+        else:
+            self._use_resolver(self._sessions[alias], caching_resolver)
+            logger.info(f"DNS cache enabled for session '{alias}', ttl={caching_resolver.ttl}s")
+
+    @staticmethod
+    def _use_resolver(record, caching_resolver):
+        if not resolver.install_resolver(record.client, caching_resolver):
+            raise RuntimeError(f"Session '{record.alias}' does not use a connection pool, "
+                               "DNS cache not supported.")
+        record.resolver = caching_resolver
+
+    @keyword("Warm Up Session")
+    def warm_up_session(self, alias, connections=1, url='', method='HEAD'):
+        """Warm Up Session: open keep-alive connections of a session ahead of the first requests
+
+        ``alias`` Robot Framework alias to identify the session
+
+        ``connections`` Number of connections to open, bounded by ``max_connections``
+                        of the session ``limits``. Only one connection is opened when the
+                        server negotiates HTTP/2, since it multiplexes all the requests.
+
+        ``url`` Endpoint requested on each connection, the session base url by default
+
+        ``method`` HTTP method of the warm-up requests, ``HEAD`` by default to skip
+                   transferring a body
+
+        Connect and TLS handshake latency is then paid here instead of by the first
+        requests of the tests. Warm-up responses are neither logged nor recorded in
+        the latency histogram, the phase timings or the connection pool stats, they are
+        not paced by the session rate limit and their status is not checked.
+
+        Returns the list of the durations in seconds of the warm-up request of each connection.
+
+        Examples:
+        | Warm Up Session | my_session | connections=10 |
+        | ${durations}= | Warm Up Session | my_session | connections=4 | url=/health | method=GET |
+        """
+        connections = int(connections)
+        if connections < 1:
+            raise ValueError('connections must be at least 1, got {}'.format(connections))
+        session = self._cache.switch(alias)
+        limits = self._sessions[alias].limits
+        if limits is not None and limits.max_connections is not None and connections > limits.max_connections:
+            logger.info(f'Warm up bounded by max_connections={limits.max_connections}')
+            connections = limits.max_connections
+        request_url = self._get_url(session, url)
+        method = method.upper()
+        if isinstance(session, AsyncClient):
+            durations = self._run_coroutine(self._warm_up_async(session, method, request_url, connections))
+        else:
+            durations = self._warm_up_sync(session, method, request_url, connections)
+        logger.info(f"Warm up of session '{alias}': " + ', '.join(
+            f'connection {index + 1}: {duration:.6f}s' for index, duration in enumerate(durations)))
+        return durations
+
+    @staticmethod
+    def _warm_up_sync(session, method, url, connections):
+        """
+        Keeps the warm-up responses open, forcing the pool to open a new connection
+        for each of the following requests. The body is drained from the raw stream,
+        which does not close the response, so that the connection is kept alive
+        once the responses are closed
+        """
+        durations = []
+        with ExitStack() as stack:
+            for _ in range(connections):
+                start = time.perf_counter()
+                resp = stack.enter_context(session.stream(method, url, extensions={tracing.WARM_UP: True}))
+                for _ in resp.stream:
+                    pass
+                durations.append(time.perf_counter() - start)
+                if resp.http_version == 'HTTP/2':
+                    break
+        return durations
+
+    @staticmethod
+    async def _warm_up_async(session, method, url, connections):
+        durations = []
+        async with AsyncExitStack() as stack:
+            for _ in range(connections):
+                start = time.perf_counter()
+                resp = await stack.enter_async_context(
+                    session.stream(method, url, extensions={tracing.WARM_UP: True}))
+                async for _ in resp.stream:
+                    pass
+                durations.append(time.perf_counter() - start)
+                if resp.http_version == 'HTTP/2':
+                    break
+        return durations
+
+    def _log_exchange(self, session, resp):
+        """
+        Logs the request and the response of ``resp`` according to the session log policy
+        """
+        log_policy = self._sessions.for_client(session).log_policy
+        mode = log_policy.mode_for(resp)
+        log.log_request(resp, mode, log_policy.artifacts)
+        log.log_response(resp, mode, log_policy.artifacts)
+        self._log_wire_trace(resp)
+
+    @staticmethod
+    def _log_wire_trace(resp):
+        if resp.wire_trace:
+            logger.debug(f'Wire trace of {resp.request.method} {resp.url}:\n{resp.wire_trace}')
+
     def _common_request(
             self,
             method,
@@ -686,18 +1214,22 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             uri,
             **kwargs):
 
-        method_function = getattr(session, method)
-        self._capture_output()
+        method_function = self._get_method_function(session, method)
+        url = self._get_url(session, uri)
 
         # if method = get atch the api in _api from httpx
-        resp = method_function(
-            self._get_url(session, uri),
-            **kwargs)
+        resp = self._call_with_circuit_breaker(self._sessions.for_client(session).alias, url,
+                                               lambda: method_function(url, **kwargs))
+        self._handle_response(method, session, resp, kwargs)
+        return resp
 
-        log.log_request(resp)
-        self._print_debug()
+    def _handle_response(self, method, session, resp, kwargs):
+        """
+        Keeps ``resp`` as the last response of ``session`` and logs it,
+        then closes the file descriptor sent as ``data`` of a GET request
+        """
         session.last_resp = resp
-        log.log_response(resp)
+        self._log_exchange(session, resp)
 
         data = kwargs.get('data', None)
         # epkcfsm remove this if request was a get
@@ -705,8 +1237,158 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
             if is_file_descriptor(data):
                 data.close()
 
+    def _common_download(
+            self,
+            session,
+            uri,
+            path,
+            chunk_size,
+            expected_status=None,
+            msg=None,
+            **kwargs):
+        """
+        Streams the body of a GET request on ``session`` to the file ``path``
+        in chunks of ``chunk_size`` bytes, the status is checked before writing.
+        A response with an unexpected status is read and logged as `_common_request` does.
+        The request goes through the circuit breaker of the session.
+        """
+        chunk_size = int(chunk_size)
+        url = self._get_url(session, uri)
+        alias = self._sessions.for_client(session).alias
+        if isinstance(session, AsyncClient):
+            resp = self._run_coroutine(self._call_with_circuit_breaker_async(
+                alias, url, lambda: self._download_async(session, url, path, chunk_size, expected_status, **kwargs)))
+        else:
+            resp = self._call_with_circuit_breaker(
+                alias, url, lambda: self._download(session, url, path, chunk_size, expected_status, **kwargs))
+
+        self._record_timings(session, resp)
+        session.last_resp = resp
+        if resp.bytes_written is None:
+            self._log_exchange(session, resp)
+            # checked again out of the circuit breaker, an unexpected status is not a failure of the host
+            self._check_status(expected_status, resp, msg)
+        download = DownloadResponse(resp, path, resp.bytes_written)
+        log_policy = self._sessions.for_client(session).log_policy
+        mode = log_policy.mode_for(resp)
+        self._log_wire_trace(resp)
+        if mode == log.LOG_OFF:
+            return download
+        log.log_request(resp, mode, log_policy.artifacts)
+        logger.info("GET Response : url=%s \n " % download.url +
+                    "status=%s, reason=%s \n " % (download.status_code, download.reason_phrase) +
+                    "headers=%s \n " % download.headers +
+                    "body=%s bytes written to %s \n " % (download.bytes_written, path))
+        return download
+
+    def _download(self, session, url, path, chunk_size, expected_status, **kwargs):
+        """
+        Writes the body of ``url`` to ``path`` and sets the ``bytes_written`` of the response,
+        a response with an unexpected status is read in memory with ``bytes_written`` set to None
+        """
+        with session.stream('GET', url, **kwargs) as resp:
+            if not self._has_expected_status(expected_status, resp):
+                resp.read()
+                resp.bytes_written = None
+                return resp
+            resp.bytes_written = 0
+            with open(path, 'wb') as f:
+                for chunk in resp.iter_bytes(chunk_size):
+                    resp.bytes_written += f.write(chunk)
+        return resp
+
+    async def _download_async(self, session, url, path, chunk_size, expected_status, **kwargs):
+        async with session.stream('GET', url, **kwargs) as resp:
+            if not self._has_expected_status(expected_status, resp):
+                await resp.aread()
+                resp.bytes_written = None
+                return resp
+            resp.bytes_written = 0
+            with open(path, 'wb') as f:
+                async for chunk in resp.aiter_bytes(chunk_size):
+                    resp.bytes_written += f.write(chunk)
         return resp
 
+    def _has_expected_status(self, expected_status, resp):
+        try:
+            self._check_status(expected_status, resp)
+        except Exception:
+            return False
+        return True
+
+    def _common_requests_concurrently(
+            self,
+            session,
+            requests,
+            max_concurrency):
+        """
+        Sends all the ``requests`` specs on ``session`` with at most ``max_concurrency``
+        requests in flight, then logs and checks each response in input order
+        """
+        max_concurrency = int(max_concurrency)
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1, got {}'.format(max_concurrency))
+        specs = [self._parse_request_spec(spec) for spec in requests]
+        calls = [(method, self._get_url(session, uri), kwargs) for method, uri, kwargs, _, _ in specs]
+
+        outcomes = self._send_concurrently(session, calls, max_concurrency)
+
+        responses = []
+        for (method, _, kwargs, expected_status, msg), outcome in zip(specs, outcomes):
+            if isinstance(outcome, Exception):
+                raise outcome
+            self._handle_response(method, session, outcome, kwargs)
+            self._check_status(expected_status, outcome, msg)
+            responses.append(outcome)
+        return responses
+
+    def _send_concurrently(self, session, calls, max_concurrency):
+        """
+        Executes ``(method, url, kwargs)`` calls on ``session`` concurrently, each
+        through the circuit breaker of the session as `_common_request` does.
+        Returns a response or the raised exception for each call, in input order
+        """
+        alias = self._sessions.for_client(session).alias
+        if isinstance(session, AsyncClient):
+            async def send_all():
+                semaphore = asyncio.Semaphore(max_concurrency)
+
+                async def send(method, url, kwargs):
+                    async with semaphore:
+                        return await self._call_with_circuit_breaker_async(
+                            alias, url, lambda: self._send_async(session, method, url, **kwargs))
+
+                return await asyncio.gather(*(send(*call) for call in calls), return_exceptions=True)
+
+            return self._run_coroutine(send_all())
+
+        def send(call):
+            method, url, kwargs = call
+            method_function = self._get_method_function(session, method)
+            try:
+                return self._call_with_circuit_breaker(alias, url, lambda: method_function(url, **kwargs))
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            return list(executor.map(send, calls))
+
+    @staticmethod
+    def _parse_request_spec(spec):
+        """
+        Splits a request spec dictionary into method, url, request arguments,
+        expected status and message
+        """
+        spec = dict(spec)
+        try:
+            uri = spec.pop('url')
+        except KeyError:
+            raise ValueError('Request spec without url: {}'.format(spec))
+        method = str(spec.pop('method', 'GET')).lower()
+        expected_status = spec.pop('expected_status', None)
+        msg = spec.pop('msg', None)
+        return method, uri, spec, expected_status, msg
+
     def _common_request_with_retry(
             self,
             method,
@@ -720,31 +1402,106 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
         if not use_retry:
             return self._common_request(method, session, uri, **kwargs)
         
-        # Get session alias for retry config lookup
-        session_alias = None
-        for alias, cached_session in self._cache._connections.items():
-            if cached_session is session:
-                session_alias = alias
-                break
-        
-        retry_config = self._get_retry_config(session_alias)
-        method_function = getattr(session, method)
+        retry_config = self._get_retry_config(self._sessions.for_client(session).alias)
+        method_function = self._get_method_function(session, method)
+        url = self._get_url(session, uri)
         
-        def request_with_logging():
-            self._capture_output()
-            resp = method_function(self._get_url(session, uri), **kwargs)
-            log.log_request(resp)
-            self._print_debug()
-            session.last_resp = resp
-            log.log_response(resp)
-            
-            data = kwargs.get('data', None)
-            if method == "get" and is_file_descriptor(data):
-                data.close()
-            
+        def request_with_logging(**request_kwargs):
+            resp = method_function(url, **request_kwargs)
+            self._handle_response(method, session, resp, request_kwargs)
             return resp
         
-        return self._execute_with_retry(request_with_logging, retry_config)
+        return self._execute_with_retry(request_with_logging, retry_config,
+                                        circuit_host=self._circuit_host(url),
+                                        session_timeout=session.timeout,
+                                        **kwargs)
+
+    def _get_method_function(self, session, method):
+        """
+        Returns a blocking callable for the ``method`` of ``session`` that records
+        the latency of each response, async sessions are driven to completion
+        on the library event loop
+        """
+        if isinstance(session, AsyncClient):
+            return lambda *args, **kwargs: self._run_coroutine(self._send_async(session, method, *args, **kwargs))
+
+        method_function = getattr(session, method)
+
+        def run_method_function(*args, **kwargs):
+            resp = method_function(*args, **jsoncodec.prepare_json_body(kwargs, session.headers))
+            return self._response_received(session, resp)
+
+        return run_method_function
+
+    async def _send_async(self, session, method, *args, **kwargs):
+        """ Awaitable counterpart of the `_get_method_function` callables for an asynchronous ``session`` """
+        resp = await getattr(session, method)(*args, **jsoncodec.prepare_json_body(kwargs, session.headers))
+        return self._response_received(session, resp)
+
+    def _response_received(self, session, resp):
+        self._record_timings(session, resp)
+        return jsoncodec.bind_json_decoder(resp)
+
+    def _record_timings(self, session, resp):
+        """
+        Records the latency and the phase timings of ``resp`` in its session,
+        the phase timings and the wire trace of the request are also attached
+        to the response as ``timings`` and ``wire_trace``
+        """
+        record = self._sessions.for_client(session)
+        trace = tracing.response_trace(resp)
+        resp.timings = trace.timings if trace is not None else {}
+        resp.wire_trace = tracing.format_wire_trace(trace) if trace is not None else ''
+        record.phase_timings.record(resp.timings)
+        try:
+            elapsed = resp.elapsed
+        except RuntimeError:
+            # elapsed is only available once the response has been closed
+            return
+        record.latency_histogram.record(elapsed.total_seconds())
+
+    def _get_event_loop(self):
+        """
+        Returns the event loop owned by the library, created on first use
+        """
+        if self._event_loop is None or self._event_loop.is_closed():
+            self._event_loop = asyncio.new_event_loop()
+        return self._event_loop
+
+    def _run_coroutine(self, coroutine):
+        return self._get_event_loop().run_until_complete(coroutine)
+
+    def _close_async_clients(self, records):
+        """
+        Closes the asynchronous clients of the session ``records`` on the library
+        event loop, then the loop if no other session needs it
+        """
+        for record in records:
+            if isinstance(record.client, AsyncClient) and not record.client.is_closed:
+                self._run_coroutine(record.client.aclose())
+        self._close_event_loop()
+
+    def _close_event_loop(self):
+        """
+        Closes the library event loop once no asynchronous session or shared
+        connection pool is bound to it, it is created again on next use
+        """
+        loop = self._event_loop
+        if loop is None or loop.is_closed():
+            return
+        if self._shared_transports.asynchronous or any(isinstance(r.client, AsyncClient) for r in self._sessions):
+            return
+        self._event_loop = None
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+    def _close(self):
+        """ Library listener method, closes the asynchronous clients, shared pools and event loop """
+        records = list(self._sessions)
+        self._cache.empty_cache()
+        self._sessions.clear()
+        self._shared_transports.close(self._run_coroutine)
+        self._close_async_clients(records)
 
     @staticmethod
     def _check_status(expected_status, resp, msg=None):
@@ -784,23 +1541,3 @@ class SessionKeywords(HttpxKeywords, RetryKeywords):
     @staticmethod
     def _get_timeout(timeout):
         return float(timeout) if timeout is not None else DEFAULT_TIMEOUT_CONFIG
-
-    def _capture_output(self):
-        if self.debug >= 1:
-            self.http_log = utils.WritableObject()
-            sys.stdout = self.http_log
-
-    def _print_debug(self):
-        if self.debug >= 1:
-            sys.stdout = sys.__stdout__  # Restore stdout
-            debug_info = ''.join(
-                self.http_log.content).replace(
-                '\\r',
-                '').replace(
-                '\'',
-                '')
-
-            # Remove empty lines
-            debug_info = "\n".join(
-                [ll.rstrip() for ll in debug_info.splitlines() if ll.strip()])
-            logger.debug(debug_info)
@@ -0,0 +1,179 @@
+import re
+
+from robot.api import logger
+from robot.api.deco import keyword
+
+from HttpxLibrary.histogram import LatencyHistogram
+
+
+CONNECTION_INFO = re.compile(r'(?P<http_version>HTTP/[\d.]+), (?P<state>\w+), Request Count: (?P<requests>\d+)$')
+
+
+class StatisticsKeywords:
+    """Keywords to inspect the statistics collected by sessions"""
+
+    @keyword("Get Latency Percentile")
+    def get_latency_percentile(self, alias: str, percentile: float) -> float:
+        """
+        Returns the response latency in seconds of the given ``percentile`` of the requests sent on a session.
+
+        Every response of the session is recorded in a log bucketed histogram, percentiles are
+        therefore approximated with a relative error of at most 1%. The minimum and maximum
+        (``percentile`` 0 and 100) are exact.
+
+        Examples:
+        | ${p99}=  | Get Latency Percentile | my_session | 99   |
+        | ${p999}= | Get Latency Percentile | my_session | 99.9 |
+        | Should Be True | ${p99} < 0.5 |
+        """
+        return self._sessions[alias].latency_histogram.percentile(percentile)
+
+    @keyword("Get Latency Histogram")
+    def get_latency_histogram(self, alias: str) -> LatencyHistogram:
+        """
+        Returns the latency histogram of a session.
+
+        The histogram exposes ``count``, ``min``, ``mean``, ``max`` and ``percentile()``,
+        histograms of different sessions can be combined with ``merge()``.
+
+        Examples:
+        | ${histogram}= | Get Latency Histogram | my_session |
+        | Log | ${histogram.count} requests, median ${histogram.percentile(50)} s |
+        """
+        return self._sessions[alias].latency_histogram
+
+    @keyword("Reset Latency Histogram")
+    def reset_latency_histogram(self, alias: str):
+        """
+        Forgets the latencies recorded so far by a session.
+
+        Examples:
+        | Reset Latency Histogram | my_session |
+        """
+        self._sessions[alias].latency_histogram.reset()
+        logger.info(f"Latency histogram of session '{alias}' reset")
+
+    @keyword("Get Phase Timings")
+    def get_phase_timings(self, alias: str) -> dict:
+        """
+        Returns the latency histograms of each phase of the requests sent on a session.
+
+        The dictionary holds one histogram, as returned by `Get Latency Histogram`, per phase:
+
+        | = Phase = | = Explanation = |
+        | dns       | Host name resolution, only with a DNS cache (see `Enable DNS Cache`). |
+        | connect   | Opening of the TCP connection, host name resolution included without DNS cache. |
+        | tls       | TLS handshake. |
+        | send      | Sending of the request headers and body. |
+        | ttfb      | Time to first byte: wait for the response headers once the request is sent. |
+        | body      | Download of the response body. |
+
+        ``dns``, ``connect`` and ``tls`` are only recorded by the requests opening a new connection.
+        The phases of a single request are available on the response as ``${response.timings}``.
+        A large ``ttfb`` points to a slow server, large ``dns``, ``connect``, ``tls`` or ``body``
+        durations to a slow network.
+
+        Examples:
+        | ${timings}= | Get Phase Timings | my_session |
+        | Log | ${timings}[ttfb] |
+        | Should Be True | ${timings}[ttfb].percentile(99) < 0.2 |
+        """
+        histograms = dict(self._sessions[alias].phase_timings.histograms)
+        logger.info('\n'.join(f'{phase}: {histogram}' for phase, histogram in histograms.items()))
+        return histograms
+
+    @keyword("Reset Phase Timings")
+    def reset_phase_timings(self, alias: str):
+        """
+        Forgets the phase timings recorded so far by a session.
+
+        Examples:
+        | Reset Phase Timings | my_session |
+        """
+        self._sessions[alias].phase_timings.reset()
+        logger.info(f"Phase timings of session '{alias}' reset")
+
+    @keyword("Get Connection Pool Stats")
+    def get_connection_pool_stats(self, alias: str) -> dict:
+        """
+        Returns statistics of the connection pool of a session as a dictionary.
+
+        | = Key =              | = Explanation = |
+        | connections          | Number of connections in the pool, including the ones being opened. |
+        | idle                 | Number of open connections waiting for a request. |
+        | active               | Number of connections sending a request or receiving a response. |
+        | new_connections      | Number of requests of the session that opened a new connection. |
+        | reused_connections   | Number of requests of the session sent on a kept alive connection. |
+        | connection_details   | List with the ``http_version``, ``state`` and number of ``requests`` of each connection. |
+
+        ``new_connections`` and ``reused_connections`` count the requests since the session was
+        created or since `Reset Connection Pool Stats`. A pool shared with ``shared_pool=True``
+        reports the connections of all the sessions using it.
+
+        Examples:
+        | ${stats}= | Get Connection Pool Stats | my_session |
+        | Should Be True | ${stats}[reused_connections] > ${stats}[new_connections] |
+        | Should Be True | ${stats}[connections] <= 10 |
+        """
+        record = self._sessions[alias]
+        details = []
+        for connection in self._pool_connections(record.client):
+            match = CONNECTION_INFO.search(connection.info())
+            if match:
+                details.append({'http_version': match.group('http_version'),
+                                'state': match.group('state'),
+                                'requests': int(match.group('requests'))})
+            else:
+                details.append({'http_version': None, 'state': connection.info(), 'requests': 0})
+        stats = {
+            'connections': len(details),
+            'idle': sum(1 for detail in details if detail['state'] == 'IDLE'),
+            'active': sum(1 for detail in details if detail['state'] == 'ACTIVE'),
+            'new_connections': record.connection_counts.new,
+            'reused_connections': record.connection_counts.reused,
+            'connection_details': details,
+        }
+        logger.info(f"Connection pool of session '{alias}': {stats}")
+        return stats
+
+    @keyword("Reset Connection Pool Stats")
+    def reset_connection_pool_stats(self, alias: str):
+        """
+        Resets the counts of new and reused connections of a session.
+
+        Examples:
+        | Reset Connection Pool Stats | my_session |
+        """
+        self._sessions[alias].connection_counts.reset()
+        logger.info(f"Connection pool stats of session '{alias}' reset")
+
+    @keyword("Get DNS Cache Stats")
+    def get_dns_cache_stats(self, alias: str = None) -> dict:
+        """
+        Returns the statistics of the DNS cache of a session, or of the cache shared
+        by the sessions when no ``alias`` is given, see `Enable DNS Cache`.
+
+        | = Key =   | = Explanation = |
+        | hits      | Number of connections opened to a cached or overridden address. |
+        | misses    | Number of host names resolved by the system resolver. |
+        | entries   | Number of host names currently cached. |
+        | overrides | Dictionary of the static host name overrides. |
+        | ttl       | Number of seconds an address is cached. |
+
+        Examples:
+        | ${stats}= | Get DNS Cache Stats | my_session |
+        | Should Be Equal As Integers | ${stats}[misses] | 1 |
+        """
+        caching_resolver = self._resolver if alias is None else self._sessions[alias].resolver
+        if caching_resolver is None:
+            raise RuntimeError('DNS cache not enabled' + (f" for session '{alias}'" if alias else ''))
+        stats = caching_resolver.stats
+        logger.info(f'DNS cache stats: {stats}')
+        return stats
+
+    @staticmethod
+    def _pool_connections(client):
+        """Connections of the httpcore pool behind ``client``, none for custom transports"""
+        # noinspection PyProtectedMember
+        pool = getattr(client._transport, '_pool', None)
+        return list(getattr(pool, 'connections', []))
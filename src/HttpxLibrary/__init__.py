@@ -71,7 +71,9 @@ class HttpxLibrary(HttpxOnSessionKeywords):
         | reason_phrase  | Textual reason of responded HTTP Status, e.g. ``Not Found`` or ``OK``. |
         | status_code    | Integer Code of responded HTTP Status, e.g. 404 or 200. |
         | text           | Content of the response, in unicode. If ``response.encoding`` is ``None``, encoding will be guessed using chardet. The encoding of the response content is determined based solely on HTTP headers, following RFC 2616 to the letter. If you can take advantage of non-HTTP knowledge to make a better guess at the encoding, you should set ``response.encoding`` appropriately before accessing this property. |
+        | timings        | Duration in seconds of each phase of the request (``dns``, ``connect``, ``tls``, ``send``, ``ttfb`` and ``body``) as a dictionary, phases that did not happen are left out. See `Get Phase Timings`. |
         | url            | Final URL location of Response. |
+        | wire_trace     | Connection, TLS and header events of the request with their timing, recorded by the sessions created with ``debug=1``. |
         """
     __version__ = VERSION
     ROBOT_LIBRARY_SCOPE = 'GLOBAL'
@@ -1,8 +1,5 @@
 import sys
-
-from requests.compat import OrderedDict  # noqa
-from requests.sessions import merge_cookies, merge_setting  # noqa
-from requests.structures import CaseInsensitiveDict  # noqa
+from collections import OrderedDict  # noqa
 
 PY3 = sys.version_info > (3,)
 
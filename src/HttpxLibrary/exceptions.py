@@ -8,3 +8,7 @@ class InvalidResponse(Exception):
 
 class InvalidExpectedStatus(Exception):
     pass
+
+
+class CircuitOpenError(Exception):
+    pass
@@ -0,0 +1,111 @@
+import math
+import threading
+from array import array
+
+
+class LatencyHistogram:
+    """
+    Log bucketed latency histogram with a bounded relative error.
+
+    Latencies are recorded in seconds into a fixed array of counters, bucket ``i`` holding
+    the values in ``(lowest * gamma ** (i - 1), lowest * gamma ** i]``. Memory does not grow
+    with the number of recorded values and histograms with the same layout can be merged.
+    Values can be recorded from several threads.
+    """
+
+    def __init__(self, lowest: float = 1e-6, highest: float = 3600.0, precision: float = 0.01):
+        if not 0 < lowest < highest:
+            raise ValueError(f"Invalid histogram range: lowest={lowest}, highest={highest}")
+        if not 0 < precision < 1:
+            raise ValueError(f"Invalid histogram precision: {precision}")
+        self.lowest = lowest
+        self.highest = highest
+        self.precision = precision
+        self._gamma = (1 + precision) / (1 - precision)
+        self._log_gamma = math.log(self._gamma)
+        self._counts = array('Q', [0]) * (self._index(highest) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def _index(self, value: float) -> int:
+        if value <= self.lowest:
+            return 0
+        return math.ceil(math.log(value / self.lowest) / self._log_gamma)
+
+    def _value(self, index: int) -> float:
+        return self.lowest * 2 * self._gamma ** index / (self._gamma + 1)
+
+    def record(self, value: float, count: int = 1):
+        """Record ``count`` occurrences of a latency of ``value`` seconds"""
+        value = float(value)
+        index = min(self._index(value), len(self._counts) - 1)
+        with self._lock:
+            self._counts[index] += count
+            self.count += count
+            self.total += value * count
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percentile: float) -> float:
+        """Latency in seconds below which ``percentile`` percent of the recorded values fall"""
+        percentile = float(percentile)
+        if not 0 <= percentile <= 100:
+            raise ValueError(f"Percentile must be between 0 and 100, got {percentile}")
+        with self._lock:
+            if not self.count:
+                raise ValueError("No latency recorded")
+            if percentile == 0:
+                return self.min
+            if percentile == 100:
+                return self.max
+            rank = max(1, math.ceil(percentile / 100 * self.count))
+            seen = 0
+            for index, bucket_count in enumerate(self._counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return min(max(self._value(index), self.min), self.max)
+            return self.max
+
+    @property
+    def mean(self):
+        with self._lock:
+            return self.total / self.count if self.count else None
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Add the values recorded in ``other`` to this histogram"""
+        if (other.lowest, other.highest, other.precision) != (self.lowest, self.highest, self.precision):
+            raise ValueError("Cannot merge histograms with a different layout")
+        # snapshot ``other`` first, never holding both locks
+        with other._lock:
+            counts = array('Q', other._counts)
+            count, total, lowest, highest = other.count, other.total, other.min, other.max
+        with self._lock:
+            for index, bucket_count in enumerate(counts):
+                if bucket_count:
+                    self._counts[index] += bucket_count
+            self.count += count
+            self.total += total
+            if count:
+                self.min = lowest if self.min is None else min(self.min, lowest)
+                self.max = highest if self.max is None else max(self.max, highest)
+
+    def reset(self):
+        """Forget all the recorded values"""
+        with self._lock:
+            self._counts = array('Q', [0]) * len(self._counts)
+            self.count = 0
+            self.total = 0.0
+            self.min = None
+            self.max = None
+
+    def __len__(self):
+        return self.count
+
+    def __str__(self):
+        if not self.count:
+            return "count=0"
+        return (f"count={self.count}, min={self.min:.6f}s, mean={self.mean:.6f}s, "
+                f"p50={self.percentile(50):.6f}s, p99={self.percentile(99):.6f}s, max={self.max:.6f}s")
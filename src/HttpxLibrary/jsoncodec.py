@@ -0,0 +1,147 @@
+import importlib
+import json
+
+import httpx
+
+
+class JsonCodec:
+    """ JSON backend based on the standard library json module """
+
+    name = 'json'
+    decode_errors = (TypeError, ValueError)
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        """ Serializes ``obj`` to a string """
+        return json.dumps(obj)
+
+    def encode(self, obj):
+        """ Serializes ``obj`` to compact UTF-8 bytes for request bodies """
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def pretty(self, obj):
+        """ Serializes ``obj`` with sorted keys and 4 spaces indentation """
+        return json.dumps(obj, sort_keys=True, indent=4, separators=(',', ': '))
+
+
+class OrjsonCodec(JsonCodec):
+    """ JSON backend based on orjson, pretty printing stays on the standard library
+    since orjson only indents by 2 spaces """
+
+    name = 'orjson'
+
+    def __init__(self, module):
+        self._orjson = module
+        self.decode_errors = (TypeError, module.JSONDecodeError)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+    def dumps(self, obj):
+        return self.encode(obj).decode('utf-8')
+
+    def encode(self, obj):
+        return self._orjson.dumps(obj, option=self._orjson.OPT_NON_STR_KEYS)
+
+
+class UjsonCodec(JsonCodec):
+    """ JSON backend based on ujson """
+
+    name = 'ujson'
+
+    def __init__(self, module):
+        self._ujson = module
+        self.decode_errors = (TypeError, ValueError)
+
+    def loads(self, data):
+        return self._ujson.loads(data)
+
+    def dumps(self, obj):
+        return self._ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False)
+
+    def encode(self, obj):
+        return self.dumps(obj).encode('utf-8')
+
+    def pretty(self, obj):
+        return self._ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False, sort_keys=True, indent=4)
+
+
+class MsgspecCodec(JsonCodec):
+    """ JSON backend based on msgspec """
+
+    name = 'msgspec'
+
+    def __init__(self, module):
+        self._json = module.json
+        self.decode_errors = (TypeError, module.DecodeError)
+
+    def loads(self, data):
+        return self._json.decode(data)
+
+    def dumps(self, obj):
+        return self.encode(obj).decode('utf-8')
+
+    def encode(self, obj):
+        return self._json.encode(obj)
+
+
+JSON_CODECS = {
+    'json': (None, JsonCodec),
+    'orjson': ('orjson', OrjsonCodec),
+    'ujson': ('ujson', UjsonCodec),
+    'msgspec': ('msgspec', MsgspecCodec),
+}
+
+_codec = JsonCodec()
+
+
+def get_json_codec():
+    return _codec
+
+
+def set_json_codec(name):
+    """ Selects the library wide JSON backend, returns the previous one """
+    global _codec
+    name = str(name).strip().lower()
+    try:
+        module_name, codec_class = JSON_CODECS[name]
+    except KeyError:
+        raise ValueError("Unknown JSON backend '%s', expected one of %s" % (name, ', '.join(JSON_CODECS)))
+    if module_name is None:
+        codec = codec_class()
+    else:
+        try:
+            codec = codec_class(importlib.import_module(module_name))
+        except ImportError:
+            raise AssertionError('%s module not installed' % module_name)
+    previous, _codec = _codec, codec
+    return previous
+
+
+def prepare_json_body(kwargs, client_headers=None):
+    """
+    Serializes the ``json`` request argument with the active backend,
+    with the standard library backend httpx serializes it itself.
+    As httpx, the ``application/json`` content type is only set when neither
+    the request headers nor the ``client_headers`` of the session have one.
+    """
+    if _codec.name == JsonCodec.name or kwargs.get('json') is None:
+        return kwargs
+    kwargs = dict(kwargs)
+    body = kwargs.pop('json')
+    headers = httpx.Headers(kwargs.get('headers'))
+    if 'content-type' not in headers and 'content-type' not in (client_headers or {}):
+        headers['Content-Type'] = 'application/json'
+    kwargs['headers'] = headers
+    kwargs['content'] = _codec.encode(body)
+    return kwargs
+
+
+def bind_json_decoder(response):
+    """ Makes ``response.json()`` decode the body with the active backend """
+    if _codec.name != JsonCodec.name:
+        codec = _codec
+        response.json = lambda **kwargs: codec.loads(response.content)
+    return response
@@ -1,22 +1,137 @@
+import codecs
+import hashlib
+import html
+import itertools
 import logging
+import os
+import tempfile
 
+from httpx import RequestNotRead
 from robot.api import logger
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
 
 from HttpxLibrary.utils import is_file_descriptor
 
 LOG_CHAR_LIMIT = 10000
+TRUNCATED_SUFFIX = "... (set the log level to DEBUG or TRACE to see the full content)"
 
 
-def log_response(response):
-    logger.info("%s Response : url=%s \n " % (response.request.method.upper(),
-                                              response.url) +
-                "status=%s, reason=%s \n " % (response.status_code,
-                                              response.reason_phrase) +
-                "headers=%s \n " % response.headers +
-                "body=%s \n " % format_data_to_log_string(response.text))
+LOG_OFF = 'off'
+LOG_HEADERS = 'headers'
+LOG_TRUNCATED = 'truncated'
+LOG_FULL = 'full'
+LOG_ARTIFACTS = 'artifacts'
+LOG_SAMPLED = 'sampled'
+LOG_POLICIES = (LOG_OFF, LOG_HEADERS, LOG_TRUNCATED, LOG_FULL, LOG_ARTIFACTS, LOG_SAMPLED)
 
+ARTIFACT_DIRECTORY = 'http-bodies'
+ARTIFACT_EXTENSIONS = (('json', '.json'), ('html', '.html'), ('xml', '.xml'), ('text/', '.txt'))
 
-def log_request(response):
+
+class BodyArtifactStore:
+    """ Content addressed store of request and response bodies, identical bodies are written once """
+
+    def __init__(self, directory=None):
+        try:
+            self.output_dir = BuiltIn().get_variable_value('${OUTPUT DIR}')
+        except RobotNotRunningError:
+            self.output_dir = None
+        self.output_dir = self.output_dir or os.getcwd()
+        self.directory = directory or os.path.join(self.output_dir, ARTIFACT_DIRECTORY)
+
+    def store(self, content, content_type=None):
+        """ Writes ``content`` unless already stored, returns its path and sha256 digest """
+        digest = hashlib.sha256(content).hexdigest()
+        extension = '.bin'
+        for marker, marker_extension in ARTIFACT_EXTENSIONS:
+            if content_type and marker in content_type:
+                extension = marker_extension
+                break
+        path = os.path.join(self.directory, digest + extension)
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+        return path, digest
+
+    def link(self, content, content_type=None):
+        """ Stores ``content`` and returns an HTML link to it with its size and digest """
+        path, digest = self.store(content, content_type)
+        try:
+            href = os.path.relpath(path, self.output_dir)
+        except ValueError:
+            # on another drive than the output directory
+            href = path
+        return '<a href="%s">%s</a> (%s bytes, sha256=%s)' % (
+            html.escape(href.replace(os.sep, '/')), html.escape(os.path.basename(path)), len(content), digest)
+
+
+class LogPolicy:
+    """ Decides how much of each request and response exchange of a session is logged """
+
+    def __init__(self, policy=LOG_TRUNCATED):
+        name, _, argument = str(policy).strip().partition(':')
+        name = name.lower()
+        if name not in LOG_POLICIES:
+            raise ValueError("Unknown log policy '%s', expected one of %s or sampled:N" %
+                             (policy, ', '.join(LOG_POLICIES[:-1])))
+        self.artifacts = BodyArtifactStore(argument or None) if name == LOG_ARTIFACTS else None
+        sample_every = argument
+        if name == LOG_SAMPLED:
+            try:
+                sample_every = int(sample_every)
+            except ValueError:
+                raise ValueError("Sampled log policy needs a rate, e.g. sampled:100, got '%s'" % policy)
+            if sample_every < 1:
+                raise ValueError("Sampled log policy rate must be at least 1, got '%s'" % policy)
+        else:
+            sample_every = 1
+        self.name = name
+        self.sample_every = sample_every
+        self._exchanges = itertools.count()
+
+    def mode_for(self, response):
+        """ Returns the log mode of one exchange, error responses are always logged in full """
+        if response.is_error:
+            return LOG_ARTIFACTS if self.artifacts else LOG_FULL
+        if self.name == LOG_SAMPLED:
+            return LOG_TRUNCATED if next(self._exchanges) % self.sample_every == 0 else LOG_OFF
+        return self.name
+
+    def __str__(self):
+        if self.name == LOG_SAMPLED:
+            return '%s:%s' % (self.name, self.sample_every)
+        if self.artifacts:
+            return '%s:%s' % (self.name, self.artifacts.directory)
+        return self.name
+
+
+def log_response(response, mode=LOG_TRUNCATED, artifacts=None):
+    if mode == LOG_OFF:
+        return
+    message = ("%s Response : url=%s \n " % (response.request.method.upper(),
+                                             response.url) +
+               "status=%s, reason=%s \n " % (response.status_code,
+                                             response.reason_phrase) +
+               "headers=%s \n " % response.headers)
+    if mode == LOG_ARTIFACTS:
+        if response.content:
+            logger.info(html.escape(message) + "body=%s \n " %
+                        artifacts.link(response.content, response.headers.get('content-type')), html=True)
+            return
+        message += "body=None \n "
+    elif mode == LOG_FULL:
+        message += "body=%s \n " % (response.text or None)
+    elif mode != LOG_HEADERS:
+        message += "body=%s \n " % format_response_body_to_log_string(response)
+    logger.info(message)
+
+
+def log_request(response, mode=LOG_TRUNCATED, artifacts=None):
+    if mode == LOG_OFF:
+        return
     request = response.request
     if response.history:
         original_request = response.history[0].request
@@ -24,10 +139,25 @@ def log_request(response):
     else:
         original_request = request
         redirected = ''
-    logger.info("%s Request : " % original_request.method.upper() +
-                "url=%s %s\n " % (original_request.url, redirected) +
-                #                "path_url=%s \n " % original_request.path_url +
-                "headers=%s \n " % original_request.headers)
+    message = ("%s Request : " % original_request.method.upper() +
+               "url=%s %s\n " % (original_request.url, redirected) +
+               #                "path_url=%s \n " % original_request.path_url +
+               "headers=%s \n " % original_request.headers)
+    if mode == LOG_ARTIFACTS:
+        content = _get_request_content(original_request)
+        if content:
+            logger.info(html.escape(message) + "body=%s \n " %
+                        artifacts.link(content, original_request.headers.get('content-type')), html=True)
+            return
+    logger.info(message)
+
+
+def _get_request_content(request):
+    try:
+        return request.content
+    except RequestNotRead:
+        # streamed uploads are not kept in memory
+        return None
 
 
 #                "body=%s \n " % format_data_to_log_string(original_request.body))
@@ -41,6 +171,29 @@ def format_data_to_log_string(data, limit=LOG_CHAR_LIMIT):
         return repr(data)
 
     if len(data) > limit and logging.getLogger().level > 10:
-        data = "%s... (set the log level to DEBUG or TRACE to see the full content)" % data[:limit]
+        data = "%s%s" % (data[:limit], TRUNCATED_SUFFIX)
 
     return data
+
+
+def format_response_body_to_log_string(response, limit=LOG_CHAR_LIMIT):
+    """
+    Decodes at most ``limit`` bytes of the response body, the whole body
+    is decoded only when the log level is DEBUG or TRACE
+    """
+    if logging.getLogger().level <= 10:
+        return format_data_to_log_string(response.text, limit)
+
+    content = response.content
+    if not content:
+        return None
+
+    try:
+        decoder = codecs.getincrementaldecoder(response.charset_encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    if len(content) <= limit:
+        return decoder.decode(content, final=True)
+    # a multi byte character cut at the limit stays buffered in the decoder
+    return "%s%s" % (decoder.decode(content[:limit]), TRUNCATED_SUFFIX)
@@ -0,0 +1,54 @@
+import httpcore
+
+from HttpxLibrary import tracing
+
+
+class ResolvingNetworkBackend(httpcore.NetworkBackend):
+    """ httpcore network backend connecting to the addresses given by a caching resolver """
+
+    def __init__(self, backend, resolver):
+        self.backend = backend
+        self.resolver = resolver
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        tracing.trace_current_request('connection.resolve.started')
+        address = self.resolver.resolve(host, port)
+        tracing.trace_current_request('connection.resolve.complete')
+        return self.backend.connect_tcp(address, port, timeout=timeout, local_address=local_address,
+                                        socket_options=socket_options)
+
+    def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return self.backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    def sleep(self, seconds):
+        self.backend.sleep(seconds)
+
+
+class AsyncResolvingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """ Asynchronous httpcore network backend connecting to the addresses given by a caching resolver """
+
+    def __init__(self, backend, resolver):
+        self.backend = backend
+        self.resolver = resolver
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        tracing.trace_current_request('connection.resolve.started')
+        address = await self.resolver.resolve_async(host, port)
+        tracing.trace_current_request('connection.resolve.complete')
+        return await self.backend.connect_tcp(address, port, timeout=timeout, local_address=local_address,
+                                              socket_options=socket_options)
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self.backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds):
+        await self.backend.sleep(seconds)
+
+
+def resolving_backend(backend, resolver):
+    """ Wraps the httpcore network ``backend``, or the backend it already wraps, to resolve with ``resolver`` """
+    if isinstance(backend, (ResolvingNetworkBackend, AsyncResolvingNetworkBackend)):
+        backend = backend.backend
+    backend_class = AsyncResolvingNetworkBackend if isinstance(backend, httpcore.AsyncNetworkBackend) \
+        else ResolvingNetworkBackend
+    return backend_class(backend, resolver)
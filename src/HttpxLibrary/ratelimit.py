@@ -0,0 +1,70 @@
+import asyncio
+import threading
+import time
+
+from HttpxLibrary import tracing
+
+# seconds per unit of the ``requests/unit`` rate notation
+UNITS = {'s': 1, 'sec': 1, 'second': 1, 'm': 60, 'min': 60, 'minute': 60, 'h': 3600, 'hour': 3600}
+
+
+def parse_rate(rate):
+    """
+    Requests per second of ``rate``, given in requests per second or
+    as ``requests/unit`` with a unit of ``s``, ``min`` or ``h``
+    """
+    count, _, unit = str(rate).strip().partition('/')
+    unit = unit.strip().lower() or 's'
+    if unit.endswith('s') and unit[:-1] in UNITS:
+        unit = unit[:-1]
+    if unit not in UNITS:
+        raise ValueError('Unknown rate limit unit in {!r}, expected one of s, min or h'.format(rate))
+    return float(count) / UNITS[unit]
+
+
+class TokenBucket:
+    """
+    Token bucket filled with ``rate`` tokens per second up to ``burst`` tokens,
+    each request takes one. Requests finding the bucket empty reserve the next
+    tokens, so concurrent callers are paced in turn instead of all waking up at once.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = parse_rate(rate)
+        self.burst = int(burst)
+        if self.rate <= 0:
+            raise ValueError('Rate limit must be greater than 0, got {}'.format(rate))
+        if self.burst < 1:
+            raise ValueError('Rate limit burst must be at least 1, got {}'.format(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """ Takes a token and returns the number of seconds to wait before using it """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(-self._tokens / self.rate, 0.0)
+
+    def __str__(self):
+        return '{:g}/s burst={}'.format(self.rate, self.burst)
+
+
+def pace_requests_hook(record, asynchronous=False):
+    """
+    Returns a client request hook holding each request of the session of ``record``
+    until its rate limiter, if any, lets it go
+    """
+    if not asynchronous:
+        def pace_request(request):
+            if record.rate_limiter is not None and not request.extensions.get(tracing.WARM_UP):
+                time.sleep(record.rate_limiter.reserve())
+        return pace_request
+
+    async def pace_request_async(request):
+        if record.rate_limiter is not None and not request.extensions.get(tracing.WARM_UP):
+            await asyncio.sleep(record.rate_limiter.reserve())
+    return pace_request_async
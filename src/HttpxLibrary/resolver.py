@@ -0,0 +1,98 @@
+import ipaddress
+import socket
+import threading
+import time
+
+
+class CachingResolver:
+    """
+    Host name resolver keeping the resolved addresses for ``ttl`` seconds.
+
+    ``overrides`` maps host names to the address to connect to, as curl ``--resolve``,
+    they are never looked up nor expired.
+    """
+
+    def __init__(self, ttl=60.0, overrides=None):
+        self.ttl = float(ttl)
+        if self.ttl < 0:
+            raise ValueError('DNS cache ttl must not be negative, got {}'.format(ttl))
+        self.overrides = {str(host).lower(): str(address) for host, address in (overrides or {}).items()}
+        self.hits = 0
+        self.misses = 0
+        self._addresses = {}
+        self._lock = threading.Lock()
+
+    def cached(self, host):
+        """
+        Returns the cached address of ``host``, None when it has to be looked up
+        """
+        host = host.lower()
+        if host in self.overrides:
+            address = self.overrides[host]
+        elif _is_ip_address(host):
+            return host
+        else:
+            with self._lock:
+                address, expiry = self._addresses.get(host, (None, 0))
+                if address is None or expiry <= time.monotonic():
+                    self.misses += 1
+                    return None
+        with self._lock:
+            self.hits += 1
+        return address
+
+    def store(self, host, addresses):
+        """ Caches the first of the ``getaddrinfo`` results ``addresses`` of ``host`` and returns it """
+        address = addresses[0][4][0]
+        with self._lock:
+            self._addresses[host.lower()] = (address, time.monotonic() + self.ttl)
+        return address
+
+    def resolve(self, host, port):
+        address = self.cached(host)
+        if address is None:
+            address = self.store(host, socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+        return address
+
+    async def resolve_async(self, host, port):
+        address = self.cached(host)
+        if address is None:
+            import anyio
+            address = self.store(host, await anyio.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+        return address
+
+    def clear(self):
+        with self._lock:
+            self._addresses.clear()
+            self.hits = 0
+            self.misses = 0
+
+    @property
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._addresses),
+                    'overrides': dict(self.overrides), 'ttl': self.ttl}
+
+
+def _is_ip_address(host):
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def install_resolver(client, resolver):
+    """
+    Makes the connection pool of ``client`` resolve host names with ``resolver``,
+    returns False when the client transport has no httpcore connection pool
+    """
+    # noinspection PyProtectedMember
+    pool = getattr(client._transport, '_pool', None)
+    backend = getattr(pool, '_network_backend', None)
+    if backend is None:
+        return False
+    # httpcore is only loaded here, by the sessions using a DNS cache
+    from HttpxLibrary import networkbackend
+    pool._network_backend = networkbackend.resolving_backend(backend, resolver)
+    return True
@@ -0,0 +1,68 @@
+from robot.utils import NormalizedDict
+
+from HttpxLibrary.histogram import LatencyHistogram
+from HttpxLibrary.tracing import ConnectionCounts, PhaseTimings
+
+
+class SessionRecord:
+    """ State kept by the library for one session, next to its httpx client """
+
+    def __init__(self, alias, client, url, log_policy, limits=None):
+        self.alias = alias
+        self.client = client
+        self.url = url
+        self.limits = limits
+        self.log_policy = log_policy
+        self.latency_histogram = LatencyHistogram()
+        self.connection_counts = ConnectionCounts()
+        self.phase_timings = PhaseTimings()
+        self.resolver = None
+        self.rate_limiter = None
+        self.debug = 0
+
+    def __repr__(self):
+        return "<SessionRecord %s %s>" % (self.alias, self.url)
+
+
+class SessionRegistry:
+    """
+    Sessions created by the library, looked up in constant time by alias
+    (case and space insensitive, as Robot Framework aliases) or by client
+    """
+
+    def __init__(self):
+        self._by_alias = NormalizedDict()
+        self._by_client = {}
+
+    def register(self, record):
+        """ Adds ``record``, replacing the session previously registered with the same alias """
+        if record.alias in self._by_alias:
+            self._by_client.pop(id(self._by_alias[record.alias].client), None)
+        self._by_alias[record.alias] = record
+        self._by_client[id(record.client)] = record
+
+    def __getitem__(self, alias):
+        try:
+            return self._by_alias[alias]
+        except KeyError:
+            raise RuntimeError("Non-existing index or alias '%s'." % alias)
+
+    def for_client(self, client):
+        """ Returns the record of the session owning ``client`` """
+        try:
+            return self._by_client[id(client)]
+        except KeyError:
+            raise RuntimeError("Client %r does not belong to any session." % client)
+
+    def clear(self):
+        self._by_alias.clear()
+        self._by_client.clear()
+
+    def __contains__(self, alias):
+        return alias in self._by_alias
+
+    def __iter__(self):
+        return iter(self._by_alias.values())
+
+    def __len__(self):
+        return len(self._by_alias)
@@ -0,0 +1,46 @@
+import os
+import threading
+
+import httpx
+
+_contexts = {}
+_lock = threading.Lock()
+
+
+def _key(verify, cert, http1, http2):
+    # httpcore sets the ALPN protocols of the context from http1 and http2,
+    # sessions negotiating different protocols cannot share it
+    protocols = bool(http1), bool(http2)
+    if verify is True:
+        # httpx picks the CA bundle from these variables when verify is True
+        return verify, cert, protocols, os.environ.get('SSL_CERT_FILE'), os.environ.get('SSL_CERT_DIR')
+    return verify, cert, protocols, None, None
+
+
+def get_ssl_context(verify, cert=None, http1=True, http2=False):
+    """
+    Returns the SSL context for ``verify``, ``cert`` and the enabled HTTP versions,
+    loading the CA bundle and the client certificate only the first time they are used
+    """
+    if isinstance(cert, list):
+        cert = tuple(cert)
+    key = _key(verify, cert, http1, http2)
+    with _lock:
+        context = _contexts.get(key)
+        if context is None:
+            context = httpx.create_ssl_context(verify=verify)
+            if cert:
+                if isinstance(cert, str):
+                    context.load_cert_chain(cert)
+                else:
+                    context.load_cert_chain(*cert)
+            _contexts[key] = context
+        return context
+
+
+def clear_ssl_context_cache():
+    """ Forgets the cached SSL contexts, returns how many were cached """
+    with _lock:
+        count = len(_contexts)
+        _contexts.clear()
+        return count
@@ -0,0 +1,218 @@
+import contextvars
+import threading
+import time
+
+from HttpxLibrary.histogram import LatencyHistogram
+
+PHASES = ('dns', 'connect', 'tls', 'send', 'ttfb', 'body')
+
+# request extension marking the requests of Warm Up Session, left out of the session statistics
+WARM_UP = 'httpxlibrary.warm_up'
+
+# trace of the request opening a connection, for the network backend events
+_connecting_request = contextvars.ContextVar('connecting_request', default=None)
+
+
+class RequestTrace:
+    """
+    httpcore ``trace`` request extension recording the connection and
+    HTTP events of one request with the time they happened at.
+
+    With ``wire`` the details of each event (addresses, TLS version, headers)
+    are also kept as the wire trace of the request.
+    """
+
+    def __init__(self, chained=None, wire=False):
+        self.events = []
+        self.wire = [] if wire else None
+        self._chained = chained
+
+    def _record(self, name, info=None):
+        timestamp = time.perf_counter()
+        self.events.append((name, timestamp))
+        if self.wire is not None:
+            self.wire.append((timestamp, name, describe_event(name, info or {})))
+
+    def _record_connect(self, name, info):
+        self._record(name, info)
+        if name.startswith('connection.connect_tcp.'):
+            _connecting_request.set(self if name.endswith('.started') else None)
+
+    def __call__(self, name, info):
+        self._record_connect(name, info)
+        if self._chained is not None:
+            self._chained(name, info)
+
+    def _timestamp(self, steps, outcome, last=False):
+        events = reversed(self.events) if last else self.events
+        for name, timestamp in events:
+            step, _, event_outcome = name.rpartition('.')
+            if event_outcome == outcome and step.rpartition('.')[2] in steps:
+                return timestamp
+        return None
+
+    def _span(self, start_steps, start_outcome, end_steps, end_outcome):
+        start = self._timestamp(start_steps, start_outcome)
+        end = self._timestamp(end_steps, end_outcome, last=True)
+        if start is None or end is None:
+            return None
+        return max(end - start, 0.0)
+
+    @property
+    def timings(self):
+        """
+        Duration in seconds of each phase of the request, phases that did not happen
+        (``connect`` and ``tls`` on a reused connection for example) are left out.
+
+        ``dns`` is only measured by the sessions using a DNS cache, otherwise ``connect``
+        includes the resolution of the host name. ``send`` covers the request headers
+        and body, ``ttfb`` the wait for the response headers once the request is sent
+        and ``body`` the download of the response body.
+        """
+        spans = {
+            'dns': self._span(('resolve',), 'started', ('resolve',), 'complete'),
+            'connect': self._span(('connect_tcp', 'connect_unix_socket'), 'started',
+                                  ('connect_tcp', 'connect_unix_socket'), 'complete'),
+            'tls': self._span(('start_tls',), 'started', ('start_tls',), 'complete'),
+            'send': self._span(('send_request_headers',), 'started', ('send_request_body',), 'complete'),
+            'ttfb': self._span(('send_request_body',), 'complete', ('receive_response_headers',), 'complete'),
+            'body': self._span(('receive_response_body',), 'started', ('receive_response_body',), 'complete'),
+        }
+        if spans['dns'] is not None and spans['connect'] is not None:
+            spans['connect'] = max(spans['connect'] - spans['dns'], 0.0)
+        return {phase: spans[phase] for phase in PHASES if spans[phase] is not None}
+
+    @property
+    def new_connection(self):
+        """ True when the request opened a connection instead of reusing one of the pool """
+        return any(name.startswith('connection.connect_') for name, _ in self.events)
+
+
+class AsyncRequestTrace(RequestTrace):
+    """ Trace extension of the requests sent by asynchronous clients, httpcore awaits it """
+
+    async def __call__(self, name, info):
+        self._record_connect(name, info)
+        if self._chained is not None:
+            await self._chained(name, info)
+
+
+class ConnectionCounts:
+    """ Number of requests of a session sent on a new and on a reused connection """
+
+    def __init__(self):
+        self.new = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+
+    def record(self, new_connection):
+        with self._lock:
+            if new_connection:
+                self.new += 1
+            else:
+                self.reused += 1
+
+    def reset(self):
+        with self._lock:
+            self.new = 0
+            self.reused = 0
+
+
+class PhaseTimings:
+    """ Latency histograms of each request phase of a session """
+
+    def __init__(self):
+        self.histograms = {phase: LatencyHistogram() for phase in PHASES}
+        self._lock = threading.Lock()
+
+    def record(self, timings):
+        with self._lock:
+            for phase, duration in timings.items():
+                self.histograms[phase].record(duration)
+
+    def reset(self):
+        with self._lock:
+            for histogram in self.histograms.values():
+                histogram.reset()
+
+
+def trace_current_request(name):
+    """ Records the event ``name`` in the trace of the request opening a connection, if any """
+    trace = _connecting_request.get()
+    if trace is not None:
+        trace._record(name)
+
+
+def response_trace(response):
+    """ Trace of the request of ``response``, None when the request was not traced """
+    trace = response.request.extensions.get('trace')
+    return trace if isinstance(trace, RequestTrace) else None
+
+
+def _decode(value):
+    return value.decode('latin-1') if isinstance(value, bytes) else str(value)
+
+
+def _format_headers(headers):
+    return ''.join(f'\n    {_decode(name)}: {_decode(value)}' for name, value in headers)
+
+
+def describe_event(name, info):
+    """ Short description of the details httpcore gives with the trace event ``name`` """
+    if 'exception' in info:
+        return repr(info['exception'])
+    if name.endswith('.send_request_headers.started') and 'request' in info:
+        request = info['request']
+        url = request.url
+        port = f':{url.port}' if url.port else ''
+        return (f'{_decode(request.method)} {_decode(url.scheme)}://{_decode(url.host)}{port}{_decode(url.target)}'
+                f'{_format_headers(request.headers)}')
+    result = info.get('return_value')
+    if name == 'connection.connect_tcp.complete' and result is not None:
+        return str(result.get_extra_info('server_addr') or '')
+    if name == 'connection.start_tls.complete' and result is not None:
+        ssl_object = result.get_extra_info('ssl_object')
+        return f'{ssl_object.version()} {ssl_object.cipher()[0]}' if ssl_object is not None else ''
+    if name.endswith('.receive_response_headers.complete') and isinstance(result, tuple):
+        # (http_version, status, reason, headers, ...) with HTTP/1.1, (status, headers) with HTTP/2
+        status = next((item for item in result if isinstance(item, int)), '')
+        headers = next((item for item in result if isinstance(item, list)), [])
+        return f'{status}{_format_headers(headers)}'
+    return ''
+
+
+def format_wire_trace(trace):
+    """ Formats the wire trace of ``trace``, one line per event with its time since the first one """
+    if not trace.wire:
+        return ''
+    start = trace.wire[0][0]
+    return '\n'.join(f'+{timestamp - start:.6f}s {name} {description}'.rstrip()
+                     for timestamp, name, description in trace.wire)
+
+
+def event_hooks(record, asynchronous=False):
+    """
+    Returns client event hooks tracing each request of the session of ``record``
+    """
+    trace_class = AsyncRequestTrace if asynchronous else RequestTrace
+
+    def trace_request(request):
+        if request.extensions.get(WARM_UP):
+            return
+        request.extensions['trace'] = trace_class(request.extensions.get('trace'), wire=record.debug >= 1)
+
+    def count_connection(response):
+        trace = response.request.extensions.get('trace')
+        if isinstance(trace, RequestTrace):
+            record.connection_counts.record(trace.new_connection)
+
+    if not asynchronous:
+        return {'request': [trace_request], 'response': [count_connection]}
+
+    async def trace_request_async(request):
+        trace_request(request)
+
+    async def count_connection_async(response):
+        count_connection(response)
+
+    return {'request': [trace_request_async], 'response': [count_connection_async]}
@@ -0,0 +1,93 @@
+import httpx
+
+
+class SharedHTTPTransport(httpx.HTTPTransport):
+    """
+    Transport shared by several sessions, closing one of them keeps the
+    connection pool open for the others
+    """
+
+    def __exit__(self, exc_type=None, exc_value=None, traceback=None):
+        pass
+
+    def close(self):
+        pass
+
+    def close_pool(self):
+        """ Closes the connections of the pool """
+        super().close()
+
+
+class SharedAsyncHTTPTransport(httpx.AsyncHTTPTransport):
+    """
+    Asynchronous transport shared by several sessions, closing one of them
+    keeps the connection pool open for the others
+    """
+
+    async def __aexit__(self, exc_type=None, exc_value=None, traceback=None):
+        pass
+
+    async def aclose(self):
+        pass
+
+    async def aclose_pool(self):
+        """ Closes the connections of the pool """
+        await super().aclose()
+
+
+class SharedTransports:
+    """
+    Transports shared by the sessions created with equivalent connection settings,
+    kept open across `Delete All Sessions` until explicitly closed
+    """
+
+    def __init__(self):
+        self._transports = {}
+
+    @staticmethod
+    def _key(asynchronous, ssl_context, http1, http2, limits, retries):
+        if isinstance(limits, httpx.Limits):
+            limits = (limits.max_connections, limits.max_keepalive_connections, limits.keepalive_expiry)
+        return bool(asynchronous), ssl_context, bool(http1), bool(http2), limits, int(retries or 0)
+
+    def get(self, asynchronous, ssl_context, http1, http2, limits, retries):
+        """
+        Returns the transport for these settings and whether it already existed,
+        ``ssl_context`` comes from the SSL context cache so equal ``verify`` and
+        ``cert`` settings give the same context
+        """
+        key = self._key(asynchronous, ssl_context, http1, http2, limits, retries)
+        transport = self._transports.get(key)
+        if transport is not None:
+            return transport, True
+        transport_class = SharedAsyncHTTPTransport if asynchronous else SharedHTTPTransport
+        transport = transport_class(
+            verify=ssl_context,
+            http1=http1,
+            http2=http2,
+            limits=limits,
+            retries=int(retries or 0)
+        )
+        self._transports[key] = transport
+        return transport, False
+
+    def close(self, run_coroutine):
+        """
+        Closes all the shared transports, ``run_coroutine`` drives the
+        asynchronous ones to completion
+        """
+        transports, self._transports = list(self._transports.values()), {}
+        for transport in transports:
+            if isinstance(transport, SharedAsyncHTTPTransport):
+                run_coroutine(transport.aclose_pool())
+            else:
+                transport.close_pool()
+        return len(transports)
+
+    @property
+    def asynchronous(self):
+        """ True when one of the shared transports is asynchronous """
+        return any(isinstance(transport, SharedAsyncHTTPTransport) for transport in self._transports.values())
+
+    def __len__(self):
+        return len(self._transports)
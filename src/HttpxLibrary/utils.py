@@ -1,23 +1,34 @@
 import io
-import json
 import types
 
+from httpx import Headers
 # noinspection PyProtectedMember
 from httpx._status_codes import codes
 from robot.api import logger
 
-from .compat import urlencode, PY3, CaseInsensitiveDict
+from .compat import urlencode, PY3
 from .exceptions import UnknownStatusError
+from .jsoncodec import get_json_codec
 
 
-class WritableObject:
-    """ HTTP stream handler """
+class DownloadResponse:
+    """ Outcome of a streamed download, the body is on disk and not in memory """
 
-    def __init__(self):
-        self.content = []
+    def __init__(self, response, path, bytes_written):
+        self.url = response.url
+        self.status_code = response.status_code
+        self.reason_phrase = response.reason_phrase
+        self.headers = response.headers
+        self.elapsed = response.elapsed
+        self.path = path
+        self.bytes_written = bytes_written
 
-    def write(self, string):
-        self.content.append(string)
+    @property
+    def is_success(self):
+        return 200 <= self.status_code < 300
+
+    def __repr__(self):
+        return "<DownloadResponse [%s] %s bytes to %s>" % (self.status_code, self.bytes_written, self.path)
 
 
 def parse_named_status(status_code):
@@ -41,18 +52,19 @@ def merge_headers(session, headers):
         # have priority and can override values
         merged_headers = session.headers.copy()
 
-    # Make sure merged_headers are CaseInsensitiveDict
-    if not isinstance(merged_headers, CaseInsensitiveDict):
-        merged_headers = CaseInsensitiveDict(merged_headers)
+    # Make sure merged_headers are case insensitive
+    if not isinstance(merged_headers, Headers):
+        merged_headers = Headers(merged_headers)
 
     merged_headers.update(headers)
     return merged_headers
 
 
 def is_json(data):
+    codec = get_json_codec()
     try:
-        json.loads(data)
-    except (TypeError, ValueError):
+        codec.loads(data)
+    except codec.decode_errors:
         return False
     return True
 
@@ -63,14 +75,8 @@ def json_pretty_print(content):
 
     ``content``  JSON object to pretty print
     """
-    temp = json.loads(content)
-    return json.dumps(
-        temp,
-        sort_keys=True,
-        indent=4,
-        separators=(
-            ',',
-            ': '))
+    codec = get_json_codec()
+    return codec.pretty(codec.loads(content))
 
 
 def is_string_type(data):
@@ -116,7 +122,7 @@ def format_data_according_to_header(session, data, headers):
         if headers['Content-Type'].find("application/json") != -1:
             if not isinstance(data, types.GeneratorType):
                 if str(data).strip():
-                    data = json.dumps(data)
+                    data = get_json_codec().dumps(data)
         elif headers['Content-Type'].find("application/x-www-form-urlencoded") != -1:
             data = utf8_urlencode(data)
     elif data is not None:
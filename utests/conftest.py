@@ -0,0 +1,39 @@
+import datetime
+
+import httpx
+import pytest
+
+from HttpxLibrary import HttpxLibrary
+
+
+@pytest.fixture
+def keywords():
+    library = HttpxLibrary()
+    yield library
+    # noinspection PyProtectedMember
+    library._close()
+
+
+@pytest.fixture
+def build_response():
+    """ Builds a response with ``status_code`` to a GET request of ``url``, that took ``elapsed`` seconds """
+    def build(status_code, url, elapsed=0.0, **kwargs):
+        response = httpx.Response(status_code, request=httpx.Request('GET', url), **kwargs)
+        response.elapsed = datetime.timedelta(seconds=elapsed)
+        return response
+    return build
+
+
+@pytest.fixture
+def mocked_session(keywords):
+    """
+    Creates a session of the ``keywords`` library without retries,
+    its requests are answered by ``handler`` instead of the network
+    """
+    def create(handler=lambda request: httpx.Response(200), alias='alias', url='http://mocking.rules',
+               asynchronous=False, **kwargs):
+        create_session = keywords.create_async_session if asynchronous else keywords.create_session
+        session = create_session(alias, url, retries=0, **kwargs)
+        session._transport = httpx.MockTransport(handler)
+        return session
+    return create
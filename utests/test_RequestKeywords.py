@@ -1,7 +1,16 @@
+import datetime
 import os
 import ssl
 
+import h2.settings
+import hpack
+import httpcore
+import httpx
+import hyperframe.frame
+import pytest
+
 from HttpxLibrary import HttpxLibrary
+from HttpxLibrary.exceptions import CircuitOpenError
 from utests import SCRIPT_DIR
 from utests import mock
 
@@ -13,7 +22,9 @@ def build_mocked_session_common_request(alias='alias', url='http://mocking.rules
     keywords = HttpxLibrary()
     session = keywords.create_session(alias, url, verify=verify, cookies=cookies)
     # this prevents a real network call from being executed
-    session.get = mock.MagicMock()
+    response = httpx.Response(200, request=httpx.Request('GET', url))
+    response.elapsed = datetime.timedelta(milliseconds=250)
+    session.get = mock.MagicMock(return_value=response)
     # noinspection PyProtectedMember
     return session, keywords._common_request
 
@@ -70,3 +81,328 @@ def test_common_request_with_cookies_override_default():
 #    session, m_common_request = build_mocked_session_common_request(cookies={'a': 1, 'b': 2})
 #    m_common_request('get', session, '/')
 #    session.get.assert_called_with('http://mocking.rules/', cookies={'a': 1, 'b': 2})
+
+
+def test_common_request_on_async_session(keywords):
+    session = keywords.create_async_session('alias', 'http://mocking.rules')
+    response = httpx.Response(200, request=httpx.Request('GET', 'http://mocking.rules/'))
+    session.get = mock.AsyncMock(return_value=response)
+    assert keywords.get_on_session('alias', '/') is response
+    session.get.assert_awaited_with('http://mocking.rules/', params=None)
+    assert session.last_resp is response
+
+
+def test_send_requests_concurrently_keeps_input_order(keywords, build_response):
+    session = keywords.create_session('alias', 'http://mocking.rules')
+    session.get = mock.MagicMock(side_effect=lambda url, **kwargs: build_response(200, url))
+    requests = [{'url': '/%s' % i, 'params': {'i': i}} for i in range(20)]
+    responses = keywords.send_requests_concurrently('alias', requests, max_concurrency=5)
+    assert [str(r.url) for r in responses] == ['http://mocking.rules/%s' % i for i in range(20)]
+    session.get.assert_any_call('http://mocking.rules/7', params={'i': 7})
+
+
+def test_send_requests_concurrently_checks_expected_status(keywords, build_response):
+    session = keywords.create_async_session('alias', 'http://mocking.rules')
+    session.get = mock.AsyncMock(side_effect=lambda url, **kwargs: build_response(404, url))
+    requests = [{'url': '/a', 'expected_status': '404'}, {'url': '/b'}]
+    with pytest.raises(httpx.HTTPStatusError):
+        keywords.send_requests_concurrently('alias', requests)
+    assert session.get.await_count == 2
+
+
+def test_send_requests_concurrently_requires_url(keywords):
+    keywords.create_session('alias', 'http://mocking.rules')
+    with pytest.raises(ValueError):
+        keywords.send_requests_concurrently('alias', [{'method': 'GET'}])
+
+
+@pytest.mark.parametrize('asynchronous', [False, True])
+def test_send_requests_concurrently_through_circuit_breaker(keywords, mocked_session, asynchronous):
+    sent = []
+    mocked_session(lambda request: sent.append(request) or httpx.Response(503), asynchronous=asynchronous)
+    keywords.set_session_retry_configuration('alias', circuit_failure_rate=1, circuit_window=2,
+                                             circuit_min_requests=2)
+    requests = [{'url': '/a', 'expected_status': '503'}, {'url': '/b', 'expected_status': '503'}]
+    responses = keywords.send_requests_concurrently('alias', requests)
+    assert keywords._cache.switch('alias').last_resp is responses[1]
+    with pytest.raises(CircuitOpenError):
+        keywords.send_requests_concurrently('alias', [{'url': '/c'}])
+    assert len(sent) == 2
+
+
+def test_common_request_records_latency():
+    session, m_common_request = build_mocked_session_common_request()
+    m_common_request('get', session, uri='/')
+    m_common_request('get', session, uri='/')
+    histogram = m_common_request.__self__._sessions['alias'].latency_histogram
+    assert histogram.count == 2
+    assert histogram.percentile(99) == 0.25
+
+
+def test_download_file_on_session(keywords, mocked_session, tmp_path):
+    content = os.urandom(100000)
+    session = mocked_session(lambda request: httpx.Response(200, content=iter([content])))
+    path = str(tmp_path / 'download.bin')
+    download = keywords.download_file_on_session('alias', '/file', path, chunk_size=1024)
+    assert download.status_code == 200
+    assert download.bytes_written == len(content)
+    with open(path, 'rb') as f:
+        assert f.read() == content
+    assert keywords._sessions.for_client(session).latency_histogram.count == 1
+
+
+@mock.patch('HttpxLibrary.log.logger')
+def test_download_file_on_session_does_not_write_on_error(mocked_logger, keywords, mocked_session, tmp_path):
+    session = mocked_session(lambda request: httpx.Response(404, content=iter([b'not found'])))
+    path = tmp_path / 'download.bin'
+    with pytest.raises(httpx.HTTPStatusError):
+        keywords.download_file_on_session('alias', '/file', str(path))
+    assert not path.exists()
+    assert session.last_resp.status_code == 404
+    assert session.last_resp.content == b'not found'
+    assert 'not found' in str(mocked_logger.info.call_args_list)
+
+
+@mock.patch('HttpxLibrary.log.logger')
+def test_set_session_log_policy(mocked_logger, keywords):
+    session = keywords.create_session('alias', 'http://mocking.rules', log_policy='full')
+    assert str(keywords._sessions['alias'].log_policy) == 'full'
+    keywords.set_session_log_policy('alias', 'off')
+    session.get = mock.MagicMock(return_value=httpx.Response(200, request=httpx.Request('GET', 'http://mocking.rules')))
+    keywords.get_on_session('alias', '/')
+    mocked_logger.info.assert_not_called()
+
+
+def test_shared_pool_is_reused_by_equivalent_sessions(keywords):
+    first = keywords.create_session('first', 'http://mocking.rules', shared_pool=True)
+    keywords.delete_all_sessions()
+    second = keywords.create_session('second', 'http://other.rules', shared_pool=True, headers={'a': 'b'})
+    other_limits = keywords.create_session('third', 'http://mocking.rules', shared_pool=True,
+                                           limits=httpx.Limits(max_connections=1))
+    isolated = keywords.create_session('fourth', 'http://mocking.rules')
+    assert second._transport is first._transport
+    assert other_limits._transport is not first._transport
+    assert isolated._transport is not first._transport
+    assert 'a' in second.headers and 'a' not in first.headers
+
+
+def test_close_shared_connection_pools(keywords):
+    first = keywords.create_session('first', 'http://mocking.rules', shared_pool=True)
+    keywords.create_async_session('async', 'http://mocking.rules', shared_pool=True)
+    keywords.close_shared_connection_pools()
+    assert len(keywords._shared_transports) == 0
+    second = keywords.create_session('second', 'http://mocking.rules', shared_pool=True)
+    assert second._transport is not first._transport
+
+
+def _record_requests(requests, http_version=b'HTTP/1.1'):
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, extensions={'http_version': http_version})
+    return handler
+
+
+def test_warm_up_session_bounded_by_limits(keywords, mocked_session):
+    requests = []
+    mocked_session(_record_requests(requests), limits=httpx.Limits(max_connections=2))
+    durations = keywords.warm_up_session('alias', connections=5, url='/health')
+    assert len(durations) == 2
+    assert [(r.method, str(r.url)) for r in requests] == [('HEAD', 'http://mocking.rules/health')] * 2
+    assert keywords._sessions['alias'].latency_histogram.count == 0
+
+
+@mock.patch('HttpxLibrary.ratelimit.time.sleep')
+def test_warm_up_session_left_out_of_statistics_and_pacing(sleep, keywords, mocked_session):
+    requests = []
+    mocked_session(_record_requests(requests), rate_limit='1/s')
+    keywords.warm_up_session('alias', connections=4)
+    assert len(requests) == 4
+    record = keywords._sessions['alias']
+    assert (record.connection_counts.new, record.connection_counts.reused) == (0, 0)
+    assert all(histogram.count == 0 for histogram in record.phase_timings.histograms.values())
+    sleep.assert_not_called()
+
+
+def test_warm_up_session_opens_one_http2_connection(keywords, mocked_session):
+    requests = []
+    mocked_session(_record_requests(requests, http_version=b'HTTP/2'))
+    assert len(keywords.warm_up_session('alias', connections=5)) == 1
+    assert len(requests) == 1
+
+
+def test_get_connection_pool_stats(keywords):
+    session = keywords.create_session('alias', 'http://mocking.rules')
+    connections = [mock.Mock(**{'info.return_value': "'http://mocking.rules', HTTP/1.1, IDLE, Request Count: 3"}),
+                   mock.Mock(**{'info.return_value': "'http://mocking.rules', HTTP/2, ACTIVE, Request Count: 7"}),
+                   mock.Mock(**{'info.return_value': 'CONNECTING'})]
+    session._transport = mock.Mock(_pool=mock.Mock(connections=connections))
+    keywords._sessions['alias'].connection_counts.record(True)
+    stats = keywords.get_connection_pool_stats('alias')
+    assert (stats['connections'], stats['idle'], stats['active']) == (3, 1, 1)
+    assert (stats['new_connections'], stats['reused_connections']) == (1, 0)
+    assert stats['connection_details'][1] == {'http_version': 'HTTP/2', 'state': 'ACTIVE', 'requests': 7}
+    assert stats['connection_details'][2]['state'] == 'CONNECTING'
+    keywords.reset_connection_pool_stats('alias')
+    assert keywords.get_connection_pool_stats('alias')['new_connections'] == 0
+
+
+def test_get_connection_pool_stats_with_custom_transport(keywords, mocked_session):
+    mocked_session()
+    keywords.get_on_session('alias', '/')
+    stats = keywords.get_connection_pool_stats('alias')
+    assert stats['connections'] == 0
+    assert stats['reused_connections'] == 1
+
+
+def test_response_phase_timings(keywords, mocked_session):
+    def handler(request):
+        trace = request.extensions['trace']
+        for name in ('connection.connect_tcp.started', 'connection.connect_tcp.complete',
+                     'http11.send_request_headers.started', 'http11.send_request_body.complete',
+                     'http11.receive_response_headers.complete'):
+            trace(name, {})
+        return httpx.Response(200)
+
+    mocked_session(handler)
+    response = keywords.get_on_session('alias', '/')
+    assert sorted(response.timings) == ['connect', 'send', 'ttfb']
+    timings = keywords.get_phase_timings('alias')
+    assert timings['ttfb'].count == 1
+    assert timings['tls'].count == 0
+    keywords.reset_phase_timings('alias')
+    assert keywords.get_phase_timings('alias')['ttfb'].count == 0
+
+
+def _echo_path(http_version=b'HTTP/2'):
+    return lambda request: httpx.Response(200, text=request.url.path, extensions={'http_version': http_version})
+
+
+def test_send_multiplexed_http2_requests(keywords, mocked_session):
+    session = mocked_session(_echo_path(), http2=True)
+    with mock.patch.object(keywords, '_common_requests_concurrently',
+                           wraps=keywords._common_requests_concurrently) as send:
+        responses = keywords.send_multiplexed_http2_requests(
+            'alias', [{'url': '/%s' % index} for index in range(5)], max_streams=3)
+    assert [response.text for response in responses] == ['/0', '/1', '/2', '/3', '/4']
+    assert [call.args[2] for call in send.call_args_list] == [1, 3]
+    session._transport = mock.Mock(_pool=mock.Mock(connections=[mock.Mock(_connection=mock.Mock(_max_streams=2))]))
+    assert keywords._http2_max_streams(session) == 2
+
+
+def test_send_multiplexed_http2_requests_requires_http2(keywords, mocked_session):
+    mocked_session(_echo_path(http_version=b'HTTP/1.1'), http2=True)
+    with pytest.raises(AssertionError, match='HTTP/1.1 instead of HTTP/2'):
+        keywords.send_multiplexed_http2_requests('alias', [{'url': '/'}, {'url': '/'}])
+
+
+def test_http2_max_streams_of_httpcore_connection(keywords):
+    # a real httpcore HTTP/2 connection reading the server settings from a mock network stream
+    frames = [
+        hyperframe.frame.SettingsFrame(settings={h2.settings.SettingCodes.MAX_CONCURRENT_STREAMS: 7}).serialize(),
+        hyperframe.frame.HeadersFrame(stream_id=1, data=hpack.Encoder().encode([(b':status', b'200')]),
+                                      flags=['END_HEADERS']).serialize(),
+        hyperframe.frame.DataFrame(stream_id=1, data=b'ok', flags=['END_STREAM']).serialize(),
+    ]
+    session = keywords.create_session('alias', 'https://mocking.rules', http2=True, retries=0)
+    assert keywords._http2_max_streams(session) is None
+    session._transport._pool = httpcore.ConnectionPool(network_backend=httpcore.MockBackend(frames, http2=True),
+                                                       http2=True)
+    responses = keywords.send_multiplexed_http2_requests('alias', [{'url': '/'}])
+    assert responses[0].http_version == 'HTTP/2'
+    assert keywords._http2_max_streams(session) == 7
+
+
+@mock.patch('HttpxLibrary.SessionKeywords.logger')
+def test_debug_session_logs_wire_trace(mocked_logger, keywords, mocked_session):
+    def handler(request):
+        request.extensions['trace']('http11.receive_response_headers.complete',
+                                    {'return_value': (b'HTTP/1.1', 200, b'OK', [], b'')})
+        return httpx.Response(200)
+
+    mocked_session(handler, debug=1, log_policy='off')
+    response = keywords.get_on_session('alias', '/')
+    assert 'http11.receive_response_headers.complete 200' in response.wire_trace
+    mocked_logger.debug.assert_called_once()
+    mocked_session(handler, alias='quiet')
+    assert keywords.get_on_session('quiet', '/').wire_trace == ''
+
+
+def test_on_session_keywords_fail_fast_with_open_circuit(keywords, mocked_session):
+    mocked_session(lambda request: httpx.Response(503))
+    keywords.set_session_retry_configuration('alias', circuit_failure_rate=1, circuit_window=2,
+                                             circuit_min_requests=2)
+    for _ in range(2):
+        keywords.get_on_session('alias', '/', expected_status='anything')
+    with pytest.raises(CircuitOpenError):
+        keywords.get_on_session('alias', '/', expected_status='anything')
+    state = keywords.get_circuit_breaker_state('alias', host='mocking.rules')
+    assert state['state'] == 'open'
+    assert state['rejected_requests'] == 1
+
+
+@pytest.mark.parametrize('asynchronous', [False, True])
+def test_download_load_and_wait_keywords_use_circuit_breaker(keywords, mocked_session, tmp_path, asynchronous):
+    sent = []
+    async def async_content():
+        yield b'down'
+
+    def handler(request):
+        # a streamed body gives the response its elapsed time once read
+        sent.append(request)
+        return httpx.Response(503, content=async_content() if asynchronous else iter([b'down']))
+
+    mocked_session(handler, asynchronous=asynchronous)
+    keywords.set_session_retry_configuration('alias', circuit_failure_rate=1, circuit_window=2,
+                                             circuit_min_requests=2)
+    path = tmp_path / 'download.bin'
+    with pytest.raises(httpx.HTTPStatusError):
+        keywords.download_file_on_session('alias', '/file', str(path))
+    assert not path.exists()
+    result = keywords.run_load_on_session('alias', '/', rate=1000, count=3, max_concurrency=1)
+    assert result.status_counts == {503: 1}
+    assert result.error_counts == {'CircuitOpenError': 2}
+    with pytest.raises(TimeoutError):
+        keywords.wait_until_request_succeeds('alias', 'GET', '/', timeout=0.05, interval=0.01)
+    assert len(sent) == 2
+    assert keywords.get_circuit_breaker_state('alias', host='mocking.rules')['rejected_requests'] > 2
+
+
+def test_download_unexpected_status_is_not_a_circuit_failure(keywords, mocked_session, tmp_path):
+    mocked_session(lambda request: httpx.Response(404, content=iter([b'not found'])))
+    keywords.set_session_retry_configuration('alias', circuit_failure_rate=1, circuit_window=1,
+                                             circuit_min_requests=1)
+    with pytest.raises(httpx.HTTPStatusError):
+        keywords.download_file_on_session('alias', '/file', str(tmp_path / 'download.bin'))
+    assert keywords.get_circuit_breaker_state('alias', host='mocking.rules')['state'] == 'closed'
+
+
+def test_delete_all_sessions_closes_async_clients_and_event_loop(keywords, mocked_session):
+    session = mocked_session(alias='async', asynchronous=True)
+    keywords.create_session('sync', 'http://mocking.rules')
+    keywords.get_on_session('async', '/')
+    loop = keywords._event_loop
+
+    keywords.delete_all_sessions()
+
+    assert session.is_closed
+    assert loop.is_closed()
+    assert keywords._event_loop is None
+
+
+def test_event_loop_kept_for_shared_async_pool(keywords):
+    keywords.create_async_session('async', 'http://mocking.rules', shared_pool=True)
+    keywords._get_event_loop()
+    keywords.delete_all_sessions()
+    assert not keywords._event_loop.is_closed()
+    keywords.close_shared_connection_pools()
+    assert keywords._event_loop is None
+
+
+def test_library_listener_close(keywords):
+    assert keywords.ROBOT_LIBRARY_LISTENER is keywords
+    session = keywords.create_async_session('async', 'http://mocking.rules')
+    keywords._get_event_loop()
+    keywords._close()
+    assert session.is_closed
+    assert keywords._event_loop is None
+    assert len(keywords._sessions) == 0
@@ -0,0 +1,82 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from HttpxLibrary.histogram import LatencyHistogram
+
+
+def test_empty_histogram():
+    histogram = LatencyHistogram()
+    assert histogram.count == 0
+    assert histogram.mean is None
+    with pytest.raises(ValueError):
+        histogram.percentile(50)
+
+
+def test_percentiles_within_precision():
+    random.seed(0)
+    values = sorted(random.lognormvariate(-4, 1) for _ in range(10000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    for percentile in (50, 95, 99, 99.9):
+        exact = values[int(percentile / 100 * len(values)) - 1]
+        assert histogram.percentile(percentile) == pytest.approx(exact, rel=0.02)
+    assert histogram.percentile(0) == values[0]
+    assert histogram.percentile(100) == values[-1]
+    assert histogram.mean == pytest.approx(sum(values) / len(values))
+
+
+def test_values_out_of_range_are_clamped():
+    histogram = LatencyHistogram(lowest=0.001, highest=1.0)
+    histogram.record(0)
+    histogram.record(10)
+    assert histogram.count == 2
+    assert histogram.percentile(50) == pytest.approx(0.001, rel=0.01)
+    assert histogram.percentile(99) == pytest.approx(1.0, rel=0.01)
+    assert histogram.percentile(100) == 10
+
+
+def test_merge():
+    first = LatencyHistogram()
+    second = LatencyHistogram()
+    first.record(0.1)
+    second.record(0.2, count=3)
+    first.merge(second)
+    assert first.count == 4
+    assert first.min == 0.1
+    assert first.max == 0.2
+    assert first.percentile(50) == pytest.approx(0.2, rel=0.01)
+
+
+def test_merge_different_layout():
+    with pytest.raises(ValueError):
+        LatencyHistogram().merge(LatencyHistogram(precision=0.05))
+
+
+def test_reset():
+    histogram = LatencyHistogram()
+    histogram.record(0.5)
+    histogram.reset()
+    assert histogram.count == 0
+    assert histogram.min is None
+    histogram.record(0.1)
+    assert histogram.percentile(50) == 0.1
+
+
+def test_invalid_percentile():
+    histogram = LatencyHistogram()
+    histogram.record(0.5)
+    with pytest.raises(ValueError):
+        histogram.percentile(101)
+
+
+def test_concurrent_record():
+    histogram = LatencyHistogram()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for _ in range(8):
+            executor.submit(lambda: [histogram.record(0.001) for _ in range(5000)])
+    assert histogram.count == 40000
+    assert histogram.percentile(100) == 0.001
+    assert histogram.total == pytest.approx(40.0)
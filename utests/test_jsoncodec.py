@@ -0,0 +1,86 @@
+import httpx
+import pytest
+
+from HttpxLibrary import HttpxLibrary, jsoncodec
+from HttpxLibrary.utils import is_json, json_pretty_print
+from utests import mock
+
+
+@pytest.fixture(autouse=True)
+def restore_json_codec():
+    yield
+    jsoncodec.set_json_codec('json')
+
+
+def test_default_backend_is_stdlib():
+    assert jsoncodec.get_json_codec().name == 'json'
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        jsoncodec.set_json_codec('yaml')
+
+
+def test_backend_not_installed():
+    with mock.patch('importlib.import_module', side_effect=ImportError):
+        with pytest.raises(AssertionError):
+            jsoncodec.set_json_codec('ujson')
+    assert jsoncodec.get_json_codec().name == 'json'
+
+
+def test_stdlib_backend_leaves_json_argument_to_httpx():
+    kwargs = {'json': {'a': 1}}
+    assert jsoncodec.prepare_json_body(kwargs) is kwargs
+
+
+def test_set_json_backend_keyword_returns_previous():
+    pytest.importorskip('orjson')
+    assert HttpxLibrary.set_json_backend('orjson') == 'json'
+    assert HttpxLibrary.set_json_backend('json') == 'orjson'
+
+
+def test_orjson_request_body():
+    pytest.importorskip('orjson')
+    jsoncodec.set_json_codec('orjson')
+    kwargs = jsoncodec.prepare_json_body({'json': {'a': [1, 2]}, 'headers': {'X-Test': '1'}})
+    assert 'json' not in kwargs
+    assert kwargs['content'] == b'{"a":[1,2]}'
+    assert kwargs['headers']['content-type'] == 'application/json'
+    assert kwargs['headers']['x-test'] == '1'
+
+
+def test_orjson_keeps_explicit_content_type():
+    pytest.importorskip('orjson')
+    jsoncodec.set_json_codec('orjson')
+    kwargs = jsoncodec.prepare_json_body({'json': {}, 'headers': {'Content-Type': 'application/vnd.api+json'}})
+    assert kwargs['headers']['content-type'] == 'application/vnd.api+json'
+
+
+def _echo_body(request):
+    return httpx.Response(200, content=request.content)
+
+
+def test_orjson_keeps_session_content_type(keywords, mocked_session):
+    pytest.importorskip('orjson')
+    jsoncodec.set_json_codec('orjson')
+    mocked_session(_echo_body, headers={'Content-Type': 'application/vnd.api+json'})
+    response = keywords.post_on_session('alias', '/echo', json={'data': {'type': 'articles'}})
+    assert response.request.headers.get_list('content-type') == ['application/vnd.api+json']
+    assert response.json() == {'data': {'type': 'articles'}}
+
+
+def test_orjson_utils():
+    pytest.importorskip('orjson')
+    jsoncodec.set_json_codec('orjson')
+    assert is_json('{"a": 1}') is True
+    assert is_json('{a: 1}') is False
+    assert json_pretty_print('{"b": 1, "a": 2}') == '{\n    "a": 2,\n    "b": 1\n}'
+
+
+def test_orjson_response_decoding(keywords, mocked_session):
+    pytest.importorskip('orjson')
+    jsoncodec.set_json_codec('orjson')
+    mocked_session(_echo_body)
+    response = keywords.post_on_session('alias', '/echo', json={'key': 'value'})
+    assert response.request.headers['content-type'] == 'application/json'
+    assert response.json() == {'key': 'value'}
@@ -0,0 +1,76 @@
+import time
+
+import httpx
+import pytest
+
+from HttpxLibrary.LoadKeywords import LoadResult
+from utests import mock
+
+
+def test_load_result_summary():
+    result = LoadResult()
+    result.record_response(200, 0.1)
+    result.record_response(200, 0.3)
+    result.record_response(503, 0.2)
+    result.record_error('ConnectError')
+    result.elapsed = 2.0
+    assert result.requests == 4
+    assert result.status_counts == {200: 2, 503: 1}
+    assert result.error_counts == {'ConnectError': 1}
+    assert result.errors == 1
+    assert result.achieved_rate == 2.0
+    assert result.latency_min == 0.1
+    assert result.latency_max == 0.3
+    assert result.latency_mean == pytest.approx(0.2)
+
+
+def test_load_result_empty():
+    result = LoadResult()
+    assert result.achieved_rate == 0.0
+    assert result.latency_mean is None
+
+
+def test_run_load_on_session_with_count(keywords, build_response):
+    session = keywords.create_session('alias', 'http://mocking.rules')
+    statuses = iter([200, 500] * 10)
+    session.get = mock.MagicMock(side_effect=lambda url, **kwargs: build_response(next(statuses), url))
+    result = keywords.run_load_on_session('alias', '/load', rate=1000, count=20, max_concurrency=1)
+    assert result.requests == 20
+    assert result.status_counts == {200: 10, 500: 10}
+    session.get.assert_called_with('http://mocking.rules/load')
+
+
+def test_run_load_on_async_session_counts_errors_by_retry_exception(keywords):
+    session = keywords.create_async_session('alias', 'http://mocking.rules')
+    session.get = mock.AsyncMock(side_effect=httpx.ConnectTimeout('timeout'))
+    result = keywords.run_load_on_session('alias', '/load', rate=1000, count=5)
+    assert result.error_counts == {'TimeoutException': 5}
+    assert result.latency.count == 0
+
+
+def test_run_load_on_session_stops_after_duration(keywords, build_response):
+    session = keywords.create_session('alias', 'http://mocking.rules')
+    session.get = mock.MagicMock(side_effect=lambda url, **kwargs: build_response(200, url))
+    result = keywords.run_load_on_session('alias', '/load', rate=100, duration=0.05)
+    assert result.requests == 5
+
+
+def test_run_load_on_session_records_response_elapsed(keywords, build_response):
+    session = keywords.create_session('alias', 'http://mocking.rules')
+
+    def get(url, **kwargs):
+        # client side waits, such as the session rate limit, are not part of the latency
+        time.sleep(0.05)
+        return build_response(200, url, elapsed=0.01)
+
+    session.get = mock.MagicMock(side_effect=get)
+    result = keywords.run_load_on_session('alias', '/load', rate=1000, count=2, max_concurrency=1)
+    assert result.latency_max == pytest.approx(0.01)
+    assert result.elapsed >= 0.1
+    assert keywords._sessions['alias'].latency_histogram.percentile(100) == pytest.approx(0.01)
+
+
+def test_run_load_on_session_requires_duration_or_count(keywords):
+    keywords.create_session('alias', 'http://mocking.rules')
+    with pytest.raises(ValueError):
+        keywords.run_load_on_session('alias', '/load')
@@ -1,9 +1,11 @@
 import json
 import os
 
+import pytest
 from httpx import Request
 
-from HttpxLibrary.log import format_data_to_log_string, log_request, log_response
+from HttpxLibrary.log import BodyArtifactStore, LogPolicy, format_data_to_log_string, \
+    format_response_body_to_log_string, log_request, log_response
 from utests import SCRIPT_DIR
 from utests import mock
 
@@ -84,7 +86,8 @@ def test_log_response(mocked_logger):
     response.request.method = 'GET'
     response.status_code = 200
     response.reason_phrase = 'OK'
-    response.text = "<html>body</html>"
+    response.content = b"<html>body</html>"
+    response.charset_encoding = 'ISO-8859-1'
     response.headers = {'Date': 'Sun, 10 May 2020 22:31:21 GMT', 'Expires': '-1', 'Cache-Control': 'private, max-age=0',
                         'Content-Type': 'text/html; charset=ISO-8859-1',
                         'P3P': 'CP="This is not a P3P policy! See g.co/p3phelp for more info."',
@@ -99,7 +102,7 @@ def test_log_response(mocked_logger):
                                                   "status=%s, reason=%s \n " % (response.status_code,
                                                                                 response.reason_phrase) +
                                                   "headers=%s \n " % response.headers +
-                                                  "body=%s \n " % response.text)
+                                                  "body=%s \n " % "<html>body</html>")
 
 
 def test_format_data_to_log_string_truncated_1():
@@ -154,3 +157,127 @@ def test_format_data_truncate_info_level(mocked_logger):
     mocked_logger.getLogger().level = 20
     truncated = format_data_to_log_string(data)
     assert truncated == data[:10000] + '... (set the log level to DEBUG or TRACE to see the full content)'
+
+
+def _build_response(content, charset=None):
+    response = mock.MagicMock()
+    response.content = content
+    response.charset_encoding = charset
+    return response
+
+
+@mock.patch('HttpxLibrary.log.logging')
+def test_format_response_body_truncated_without_full_decode(mocked_logging):
+    mocked_logging.getLogger().level = 20
+    response = _build_response(('\u00e8' * 20000).encode('utf-8'), 'utf-8')
+    body = format_response_body_to_log_string(response, 9999)
+    # 9999 bytes hold 4999 two bytes characters, the half character is dropped
+    assert body == '\u00e8' * 4999 + '... (set the log level to DEBUG or TRACE to see the full content)'
+
+
+@mock.patch('HttpxLibrary.log.logging')
+def test_format_response_body_not_truncated(mocked_logging):
+    mocked_logging.getLogger().level = 20
+    response = _build_response(b'caf\xe9', 'latin-1')
+    assert format_response_body_to_log_string(response) == 'caf\u00e9'
+
+
+@mock.patch('HttpxLibrary.log.logging')
+def test_format_response_body_unknown_charset(mocked_logging):
+    mocked_logging.getLogger().level = 20
+    response = _build_response(b'body', 'not-a-charset')
+    assert format_response_body_to_log_string(response) == 'body'
+
+
+@mock.patch('HttpxLibrary.log.logging')
+def test_format_response_body_empty(mocked_logging):
+    mocked_logging.getLogger().level = 20
+    assert format_response_body_to_log_string(_build_response(b'')) is None
+
+
+@mock.patch('HttpxLibrary.log.logging')
+def test_format_response_body_full_text_debug_level(mocked_logging):
+    mocked_logging.getLogger().level = 10
+    response = _build_response(b'x' * 20000)
+    response.text = 'y' * 20000
+    assert format_response_body_to_log_string(response) == response.text
+
+
+def _build_exchange(status_code=200):
+    response = _build_response(b'body', 'utf-8')
+    response.url = 'http://mock.rulezz'
+    response.request.method = 'GET'
+    response.status_code = status_code
+    response.is_error = status_code >= 400
+    response.text = 'body'
+    return response
+
+
+def test_log_policy_modes():
+    assert LogPolicy('off').mode_for(_build_exchange()) == 'off'
+    assert LogPolicy('Headers').mode_for(_build_exchange()) == 'headers'
+    assert LogPolicy().mode_for(_build_exchange()) == 'truncated'
+    assert LogPolicy('off').mode_for(_build_exchange(500)) == 'full'
+
+
+def test_log_policy_sampled():
+    policy = LogPolicy('sampled:3')
+    modes = [policy.mode_for(_build_exchange()) for _ in range(6)]
+    assert modes == ['truncated', 'off', 'off', 'truncated', 'off', 'off']
+    assert str(policy) == 'sampled:3'
+
+
+def test_log_policy_invalid():
+    for policy in ('verbose', 'sampled', 'sampled:0', 'sampled:x'):
+        with pytest.raises(ValueError):
+            LogPolicy(policy)
+
+
+@mock.patch('HttpxLibrary.log.logger')
+def test_log_response_off(mocked_logger):
+    log_response(_build_exchange(), 'off')
+    log_request(_build_exchange(), 'off')
+    mocked_logger.info.assert_not_called()
+
+
+@mock.patch('HttpxLibrary.log.logger')
+def test_log_response_headers_only(mocked_logger):
+    log_response(_build_exchange(), 'headers')
+    assert 'body=' not in mocked_logger.info.call_args[0][0]
+
+
+@mock.patch('HttpxLibrary.log.logger')
+def test_log_response_full_is_not_truncated(mocked_logger):
+    response = _build_exchange()
+    response.text = 'x' * 20000
+    log_response(response, 'full')
+    assert mocked_logger.info.call_args[0][0].endswith("body=%s \n " % response.text)
+
+
+def test_body_artifact_store_deduplicates(tmp_path):
+    store = BodyArtifactStore(str(tmp_path / 'bodies'))
+    first_path, digest = store.store(b'{"a": 1}', 'application/json')
+    second_path, _ = store.store(b'{"a": 1}', 'application/json')
+    assert first_path == second_path
+    assert first_path.endswith(digest + '.json')
+    assert len(os.listdir(str(tmp_path / 'bodies'))) == 1
+
+
+def test_log_policy_artifacts_directory(tmp_path):
+    policy = LogPolicy('artifacts:%s' % tmp_path)
+    assert policy.artifacts.directory == str(tmp_path)
+    assert policy.mode_for(_build_exchange(500)) == 'artifacts'
+    assert LogPolicy('full').artifacts is None
+
+
+@mock.patch('HttpxLibrary.log.logger')
+def test_log_response_artifacts(mocked_logger, tmp_path):
+    response = _build_exchange()
+    response.content = b'x' * 20000
+    response.headers = {'content-type': 'text/plain'}
+    log_response(response, 'artifacts', BodyArtifactStore(str(tmp_path)))
+    message = mocked_logger.info.call_args[0][0]
+    assert '(20000 bytes, sha256=' in message
+    assert 'x' * 100 not in message
+    assert mocked_logger.info.call_args[1] == {'html': True}
+    assert len(os.listdir(str(tmp_path))) == 1
@@ -0,0 +1,66 @@
+import pytest
+
+from HttpxLibrary.ratelimit import TokenBucket, parse_rate
+from utests import mock
+
+
+def test_parse_rate():
+    assert parse_rate(5) == 5.0
+    assert parse_rate('10/s') == 10.0
+    assert parse_rate('600/min') == 10.0
+    assert parse_rate('7200 / hours') == 2.0
+    with pytest.raises(ValueError):
+        parse_rate('10/day')
+
+
+def test_invalid_token_bucket():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+    with pytest.raises(ValueError):
+        TokenBucket(10, burst=0)
+
+
+def test_token_bucket_burst_then_paced():
+    with mock.patch('HttpxLibrary.ratelimit.time.monotonic', return_value=100.0):
+        bucket = TokenBucket('2/s', burst=3)
+        delays = [bucket.reserve() for _ in range(5)]
+    assert delays == [0.0, 0.0, 0.0, 0.5, 1.0]
+    with mock.patch('HttpxLibrary.ratelimit.time.monotonic', return_value=110.0):
+        # refilled up to the burst, not beyond
+        assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+
+
+@mock.patch('HttpxLibrary.ratelimit.time.sleep')
+def test_create_session_with_rate_limit(sleep, keywords, mocked_session):
+    mocked_session(rate_limit='10/s')
+    keywords.get_on_session('alias', '/')
+    keywords.get_on_session('alias', '/')
+    assert sleep.call_count == 2
+    assert sleep.call_args_list[0] == mock.call(0.0)
+    assert sleep.call_args_list[1][0][0] == pytest.approx(0.1, abs=0.01)
+
+
+@mock.patch('HttpxLibrary.ratelimit.time.sleep')
+def test_create_session_with_rate_limit_burst(sleep, keywords, mocked_session):
+    mocked_session(rate_limit='1/s', rate_limit_burst=3)
+    assert str(keywords._sessions['alias'].rate_limiter) == '1/s burst=3'
+    for _ in range(4):
+        keywords.get_on_session('alias', '/')
+    assert [call[0][0] for call in sleep.call_args_list][:3] == [0.0, 0.0, 0.0]
+    assert sleep.call_args_list[3][0][0] == pytest.approx(1.0, abs=0.01)
+
+
+@mock.patch('HttpxLibrary.ratelimit.asyncio.sleep', new_callable=mock.AsyncMock)
+def test_set_session_rate_limit_on_async_session(sleep, keywords, mocked_session):
+    mocked_session(asynchronous=True)
+    keywords.get_on_session('alias', '/')
+    sleep.assert_not_awaited()
+
+    keywords.set_session_rate_limit('alias', '1/s', burst=2)
+    for _ in range(3):
+        keywords.get_on_session('alias', '/')
+    assert [call[0][0] for call in sleep.await_args_list][:2] == [0.0, 0.0]
+    assert sleep.await_args_list[2][0][0] == pytest.approx(1.0, abs=0.01)
+
+    keywords.set_session_rate_limit('alias', 'None')
+    assert keywords._sessions['alias'].rate_limiter is None
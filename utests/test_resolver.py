@@ -0,0 +1,81 @@
+import os
+import socket
+import subprocess
+import sys
+
+import httpx
+import pytest
+
+from HttpxLibrary.networkbackend import ResolvingNetworkBackend
+from HttpxLibrary.resolver import CachingResolver, install_resolver
+from utests import SCRIPT_DIR, mock
+
+ADDRESSES = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('10.0.0.1', 443))]
+
+
+@mock.patch('HttpxLibrary.resolver.socket.getaddrinfo', return_value=ADDRESSES)
+def test_resolve_is_cached_until_ttl(getaddrinfo):
+    resolver = CachingResolver(ttl=10)
+    with mock.patch('HttpxLibrary.resolver.time.monotonic', return_value=100.0):
+        assert resolver.resolve('Example.com', 443) == '10.0.0.1'
+        assert resolver.resolve('example.com', 443) == '10.0.0.1'
+    with mock.patch('HttpxLibrary.resolver.time.monotonic', return_value=111.0):
+        resolver.resolve('example.com', 443)
+    assert getaddrinfo.call_count == 2
+    assert resolver.stats['hits'] == 1
+    assert resolver.stats['misses'] == 2
+
+
+@mock.patch('HttpxLibrary.resolver.socket.getaddrinfo')
+def test_overrides_and_ip_addresses_are_not_resolved(getaddrinfo):
+    resolver = CachingResolver(overrides={'API.example.com': '127.0.0.1'})
+    assert resolver.resolve('api.example.com', 443) == '127.0.0.1'
+    assert resolver.resolve('::1', 443) == '::1'
+    getaddrinfo.assert_not_called()
+    assert resolver.stats['hits'] == 1
+
+
+def test_negative_ttl():
+    with pytest.raises(ValueError):
+        CachingResolver(ttl=-1)
+
+
+@mock.patch('HttpxLibrary.resolver.socket.getaddrinfo', return_value=ADDRESSES)
+def test_backend_connects_to_resolved_address(getaddrinfo):
+    backend = mock.Mock()
+    ResolvingNetworkBackend(backend, CachingResolver()).connect_tcp('example.com', 443, timeout=5)
+    backend.connect_tcp.assert_called_once_with('10.0.0.1', 443, timeout=5, local_address=None,
+                                                socket_options=None)
+
+
+def test_install_resolver():
+    client = httpx.Client()
+    resolver = CachingResolver()
+    assert install_resolver(client, resolver)
+    assert install_resolver(client, resolver)
+    backend = client._transport._pool._network_backend
+    assert isinstance(backend, ResolvingNetworkBackend)
+    assert not isinstance(backend.backend, ResolvingNetworkBackend)
+    assert not install_resolver(httpx.Client(transport=httpx.MockTransport(lambda request: None)), resolver)
+
+
+def test_enable_dns_cache_keywords(keywords):
+    keywords.create_session('before', 'http://mocking.rules')
+    keywords.enable_dns_cache(ttl=5)
+    after = keywords.create_session('after', 'http://mocking.rules')
+    assert isinstance(after._transport._pool._network_backend, ResolvingNetworkBackend)
+    assert keywords.get_dns_cache_stats()['ttl'] == 5
+    with pytest.raises(RuntimeError):
+        keywords.get_dns_cache_stats('before')
+    keywords.enable_dns_cache('before', overrides={'mocking.rules': '127.0.0.1'})
+    assert keywords.get_dns_cache_stats('before')['overrides'] == {'mocking.rules': '127.0.0.1'}
+
+
+@pytest.mark.skipif(tuple(int(part) for part in httpx.__version__.split('.')[:2]) < (0, 28),
+                    reason='httpx imports httpcore lazily since 0.28')
+def test_import_does_not_load_httpcore():
+    # the DNS cache network backends load httpcore only when a cache is enabled
+    src = os.path.join(SCRIPT_DIR, '..', 'src')
+    code = 'import sys, HttpxLibrary; print(sorted({"httpcore", "anyio", "h2"} & set(sys.modules)))'
+    output = subprocess.check_output([sys.executable, '-c', code], env=dict(os.environ, PYTHONPATH=src))
+    assert output.decode().strip() == '[]'
@@ -2,7 +2,8 @@ import unittest
 from unittest.mock import Mock, patch, MagicMock
 import time
 import httpx
-from HttpxLibrary.RetryKeywords import RetryKeywords, RetryConfig
+from HttpxLibrary.exceptions import CircuitOpenError
+from HttpxLibrary.RetryKeywords import RetryKeywords, RetryConfig, RetryBudget, CircuitBreaker, get_server_delay
 
 
 class TestRetryKeywords(unittest.TestCase):
@@ -205,6 +206,265 @@ class TestRetryKeywords(unittest.TestCase):
         mock_request_func.assert_called_once()
         mock_sleep.assert_not_called()
 
+    
+    @patch('time.sleep')
+    def test_execute_with_retry_stops_at_deadline(self, mock_sleep):
+        """Test no retry is attempted when the backoff would exceed the deadline"""
+        mock_response = Mock()
+        mock_response.status_code = 500
+        
+        mock_request_func = Mock(return_value=mock_response)
+        config = RetryConfig(max_retries=5, backoff_factor=1.0, retry_on_status=[500], jitter=False, deadline=1.5)
+        
+        result = self.retry_keywords._execute_with_retry(mock_request_func, config)
+        
+        # the second backoff of 2 seconds would exceed the deadline
+        self.assertEqual(result, mock_response)
+        self.assertEqual(mock_request_func.call_count, 2)
+        mock_sleep.assert_called_once_with(1.0)
+    
+    @patch('time.sleep')
+    def test_execute_with_retry_deadline_raises_last_exception(self, mock_sleep):
+        """Test the last exception is raised when the deadline stops the retries"""
+        mock_request_func = Mock(side_effect=httpx.ConnectError("Connection failed"))
+        config = RetryConfig(max_retries=3, backoff_factor=10.0, jitter=False, deadline=5)
+        
+        with self.assertRaises(httpx.ConnectError):
+            self.retry_keywords._execute_with_retry(mock_request_func, config)
+        
+        mock_request_func.assert_called_once()
+        mock_sleep.assert_not_called()
+    
+    def test_execute_with_retry_caps_attempt_timeout_by_deadline(self):
+        """Test the timeouts of an attempt never exceed the time left before the deadline"""
+        mock_request_func = Mock(return_value=httpx.Response(200))
+        config = RetryConfig(deadline=2.0)
+        
+        self.retry_keywords._execute_with_retry(mock_request_func, config, session_timeout=httpx.Timeout(10.0))
+        timeout = mock_request_func.call_args.kwargs['timeout']
+        self.assertTrue(all(0 < value <= 2.0 for value in timeout.as_dict().values()))
+        
+        self.retry_keywords._execute_with_retry(mock_request_func, config, timeout=httpx.Timeout(1.0, read=None))
+        timeout = mock_request_func.call_args.kwargs['timeout']
+        self.assertEqual(timeout.connect, 1.0)
+        self.assertLessEqual(timeout.read, 2.0)
+        
+        self.retry_keywords._execute_with_retry(mock_request_func, RetryConfig())
+        self.assertNotIn('timeout', mock_request_func.call_args.kwargs)
+    
+    def test_retry_budget_limits_retries_to_ratio(self):
+        """Test the retry budget allows retries up to the ratio of requests in the window"""
+        budget = RetryBudget(ratio=0.2, window=60, min_retries=1)
+        for _ in range(10):
+            budget.record_request()
+        
+        self.assertTrue(budget.acquire_retry())
+        self.assertTrue(budget.acquire_retry())
+        self.assertFalse(budget.acquire_retry())
+        
+        stats = budget.stats
+        self.assertEqual(stats['requests'], 10)
+        self.assertEqual(stats['retries'], 2)
+        self.assertEqual(stats['rejected_retries'], 1)
+        self.assertIsNotNone(stats['last_rejected'])
+    
+    def test_retry_budget_window_slides(self):
+        """Test retries older than the window do not count anymore"""
+        budget = RetryBudget(ratio=0, window=10, min_retries=1)
+        with patch('HttpxLibrary.RetryKeywords.time.monotonic', return_value=100.0):
+            self.assertTrue(budget.acquire_retry())
+            self.assertFalse(budget.acquire_retry())
+        with patch('HttpxLibrary.RetryKeywords.time.monotonic', return_value=111.0):
+            self.assertTrue(budget.acquire_retry())
+        self.assertEqual(budget.total_retries, 2)
+    
+    @patch('time.sleep')
+    def test_execute_with_retry_stops_when_budget_exhausted(self, mock_sleep):
+        """Test failed requests are not retried once the budget is used"""
+        mock_response = Mock()
+        mock_response.status_code = 503
+        
+        mock_request_func = Mock(return_value=mock_response)
+        config = RetryConfig(max_retries=3, retry_on_status=[503], budget=RetryBudget(ratio=0, min_retries=2))
+        
+        self.retry_keywords._execute_with_retry(mock_request_func, config)
+        self.retry_keywords._execute_with_retry(mock_request_func, config)
+        
+        # the two allowed retries are used by the first request
+        self.assertEqual(mock_request_func.call_count, 4)
+        self.assertEqual(config.budget.stats['rejected_retries'], 2)
+    
+    def test_set_global_retry_budget(self):
+        """Test retry budget and deadline configuration keywords"""
+        self.retry_keywords.set_global_retry_configuration(deadline="30", retry_budget="20%", budget_window="10")
+        
+        config = self.retry_keywords.get_retry_configuration()
+        self.assertEqual(config['deadline'], 30.0)
+        self.assertEqual(config['retry_budget'], 0.2)
+        self.assertEqual(self.retry_keywords.get_retry_budget_stats()['window'], 10.0)
+        with self.assertRaises(RuntimeError):
+            self.retry_keywords.set_session_retry_configuration("test_session")
+            self.retry_keywords.get_retry_budget_stats("test_session")
+
+    
+    def test_server_delay_from_retry_after(self):
+        """Test Retry-After in seconds and as HTTP-date"""
+        self.assertEqual(get_server_delay(httpx.Response(503, headers={'Retry-After': '7'})), 7.0)
+        with patch('HttpxLibrary.RetryKeywords.time.time', return_value=1445412480.0):
+            response = httpx.Response(429, headers={'Retry-After': 'Wed, 21 Oct 2015 07:28:30 GMT'})
+            self.assertEqual(get_server_delay(response), 30.0)
+        self.assertIsNone(get_server_delay(httpx.Response(503, headers={'Retry-After': 'soon'})))
+        self.assertIsNone(get_server_delay(httpx.Response(503)))
+        self.assertIsNone(get_server_delay(Mock(status_code=503)))
+    
+    def test_server_delay_from_rate_limit_headers(self):
+        """Test rate limit headers are only used once the quota is exhausted"""
+        exhausted = httpx.Response(429, headers={'RateLimit-Remaining': '0', 'RateLimit-Reset': '12'})
+        self.assertEqual(get_server_delay(exhausted), 12.0)
+        available = httpx.Response(429, headers={'X-RateLimit-Remaining': '3', 'X-RateLimit-Reset': '12'})
+        self.assertIsNone(get_server_delay(available))
+        with patch('HttpxLibrary.RetryKeywords.time.time', return_value=1700000000.0):
+            epoch = httpx.Response(429, headers={'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': '1700000042'})
+            self.assertEqual(get_server_delay(epoch), 42.0)
+        structured = httpx.Response(429, headers={'RateLimit': '"default";r=0;t=5'})
+        self.assertEqual(get_server_delay(structured), 5.0)
+    
+    def test_backoff_time_uses_server_delay_capped(self):
+        """Test the server delay replaces the exponential backoff, capped by backoff_max"""
+        config = RetryConfig(backoff_factor=1.0, backoff_max=10.0, jitter=False)
+        self.assertEqual(config.get_backoff_time(0, httpx.Response(503, headers={'Retry-After': '4'})), 4.0)
+        self.assertEqual(config.get_backoff_time(0, httpx.Response(503, headers={'Retry-After': '3600'})), 10.0)
+        self.assertEqual(config.get_backoff_time(2, httpx.Response(503)), 4.0)
+        config.respect_retry_after = False
+        self.assertEqual(config.get_backoff_time(0, httpx.Response(503, headers={'Retry-After': '4'})), 1.0)
+    
+    def test_non_finite_server_delay_falls_back_to_backoff(self):
+        """Test nan and infinite server delays are ignored instead of reaching time.sleep"""
+        config = RetryConfig(backoff_factor=1.0, backoff_max=10.0, jitter=False)
+        for value in ('nan', 'inf', '-inf', 'NaN'):
+            throttled = httpx.Response(503, headers={'Retry-After': value})
+            self.assertIsNone(get_server_delay(throttled))
+            self.assertEqual(config.get_backoff_time(1, throttled), 2.0)
+        reset = httpx.Response(429, headers={'RateLimit-Remaining': '0', 'RateLimit-Reset': 'nan'})
+        self.assertIsNone(get_server_delay(reset))
+        self.assertIsNone(get_server_delay(httpx.Response(429, headers={'RateLimit': '"default";r=0;t=inf'})))
+    
+    @patch('time.sleep')
+    def test_execute_with_retry_server_delay_past_deadline(self, mock_sleep):
+        """Test a server delay capped by backoff_max but still past the deadline is not waited"""
+        throttled = httpx.Response(429, headers={'Retry-After': '3600'})
+        mock_request_func = Mock(return_value=throttled)
+        config = RetryConfig(max_retries=3, backoff_max=120.0, deadline=30.0)
+        
+        self.assertEqual(config.get_backoff_time(0, throttled), 120.0)
+        result = self.retry_keywords._execute_with_retry(mock_request_func, config)
+        
+        self.assertIs(result, throttled)
+        mock_request_func.assert_called_once()
+        mock_sleep.assert_not_called()
+    
+    @patch('time.sleep')
+    def test_execute_with_retry_sleeps_retry_after(self, mock_sleep):
+        """Test the retry waits for the Retry-After delay"""
+        throttled = httpx.Response(429, headers={'Retry-After': '2'})
+        mock_request_func = Mock(side_effect=[throttled, httpx.Response(200)])
+        config = RetryConfig(max_retries=3)
+        
+        result = self.retry_keywords._execute_with_retry(mock_request_func, config)
+        
+        self.assertEqual(result.status_code, 200)
+        mock_sleep.assert_called_once_with(2.0)
+    
+    def test_circuit_breaker_opens_at_failure_rate(self):
+        """Test the circuit of a host opens once the failure rate of its window is reached"""
+        breaker = CircuitBreaker(failure_rate=0.5, window=4, min_requests=4, cooldown=30)
+        for failure in (False, True, False):
+            self.assertTrue(breaker.allow_request('api:8080'))
+            breaker.record('api:8080', failure)
+        self.assertTrue(breaker.is_closed('api:8080'))
+        
+        breaker.record('api:8080', True)
+        
+        self.assertFalse(breaker.allow_request('api:8080'))
+        self.assertTrue(breaker.allow_request('other'))
+        state = breaker.state('api:8080')
+        self.assertEqual(state['state'], 'open')
+        self.assertEqual(state['times_opened'], 1)
+        self.assertEqual(state['rejected_requests'], 1)
+        self.assertGreater(state['retry_in'], 29)
+    
+    def test_circuit_breaker_half_open_trial(self):
+        """Test a single trial request is let through after the cooldown"""
+        breaker = CircuitBreaker(failure_rate=1, window=1, min_requests=1, cooldown=10)
+        with patch('HttpxLibrary.RetryKeywords.time.monotonic', return_value=100.0):
+            breaker.record('api', True)
+        with patch('HttpxLibrary.RetryKeywords.time.monotonic', return_value=111.0):
+            self.assertTrue(breaker.allow_request('api'))
+            self.assertFalse(breaker.allow_request('api'))
+            self.assertEqual(breaker.state('api')['state'], 'half-open')
+            breaker.record('api', True)
+            self.assertEqual(breaker.state('api')['state'], 'open')
+        with patch('HttpxLibrary.RetryKeywords.time.monotonic', return_value=122.0):
+            self.assertTrue(breaker.allow_request('api'))
+            breaker.record('api', False)
+        self.assertTrue(breaker.is_closed('api'))
+        self.assertEqual(breaker.state('api')['times_opened'], 2)
+    
+    @patch('time.sleep')
+    def test_execute_with_retry_open_circuit_fails_fast(self, mock_sleep):
+        """Test an open circuit stops the retries and fails the next requests without sending them"""
+        mock_response = Mock()
+        mock_response.status_code = 503
+        
+        mock_request_func = Mock(return_value=mock_response)
+        config = RetryConfig(max_retries=5, retry_on_status=[503],
+                             circuit_breaker=CircuitBreaker(failure_rate=1, window=2, min_requests=2))
+        
+        result = self.retry_keywords._execute_with_retry(mock_request_func, config, circuit_host='api')
+        
+        self.assertEqual(result.status_code, 503)
+        self.assertEqual(mock_request_func.call_count, 2)
+        with self.assertRaises(CircuitOpenError):
+            self.retry_keywords._execute_with_retry(mock_request_func, config, circuit_host='api')
+        self.assertEqual(mock_request_func.call_count, 2)
+    
+    def test_circuit_breaker_counts_every_exception_as_failure(self):
+        """Test a half-open trial raising any exception, even an interruption, reopens the circuit"""
+        breaker = CircuitBreaker(failure_rate=1, window=1, min_requests=1, cooldown=0)
+        breaker.record('api', True)
+        
+        with self.assertRaises(TypeError):
+            breaker.call('api', Mock(side_effect=TypeError('bad argument')), lambda status: False)
+        self.assertEqual(breaker.state('api')['state'], 'open')
+        with self.assertRaises(KeyboardInterrupt):
+            breaker.call('api', Mock(side_effect=KeyboardInterrupt), lambda status: False)
+        
+        # the interrupted trial does not hold the half-open circuit
+        self.assertEqual(breaker.call('api', Mock(return_value=Mock(status_code=200)),
+                                      lambda status: False).status_code, 200)
+        self.assertTrue(breaker.is_closed('api'))
+    
+    def test_server_errors_count_as_circuit_failures(self):
+        """Test 5xx statuses are failures even when they are not retried"""
+        config = RetryConfig(retry_on_status=[429])
+        self.assertTrue(config.is_failure_status(500))
+        self.assertTrue(config.is_failure_status(429))
+        self.assertFalse(config.is_failure_status(404))
+    
+    def test_set_circuit_breaker_configuration(self):
+        """Test circuit breaker configuration and state keywords"""
+        self.retry_keywords.set_session_retry_configuration(
+            "test_session", circuit_failure_rate="50%", circuit_window="10", circuit_cooldown="5")
+        
+        self.assertEqual(self.retry_keywords.get_retry_configuration("test_session")['circuit_failure_rate'], 0.5)
+        breaker = self.retry_keywords._get_retry_config("test_session").circuit_breaker
+        breaker.record('api', True)
+        self.assertEqual(self.retry_keywords.get_circuit_breaker_state("test_session")['api']['failures'], 1)
+        self.retry_keywords.reset_circuit_breaker("test_session", host='api')
+        self.assertEqual(self.retry_keywords.get_circuit_breaker_state("test_session"), {})
+        with self.assertRaises(RuntimeError):
+            self.retry_keywords.get_circuit_breaker_state()
+
 
 if __name__ == '__main__':
     unittest.main()
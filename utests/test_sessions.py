@@ -0,0 +1,46 @@
+import httpx
+import pytest
+
+from HttpxLibrary.log import LogPolicy
+from HttpxLibrary.sessions import SessionRecord, SessionRegistry
+
+
+def _record(alias):
+    return SessionRecord(alias, httpx.Client(), 'http://mocking.rules', LogPolicy('off'))
+
+
+def test_lookup_by_alias_ignores_case_and_spaces():
+    registry = SessionRegistry()
+    record = _record('My Session')
+    registry.register(record)
+    assert registry['mysession'] is record
+    assert 'MY SESSION' in registry
+    assert len(registry) == 1
+
+
+def test_lookup_by_client():
+    registry = SessionRegistry()
+    first, second = _record('first'), _record('second')
+    registry.register(first)
+    registry.register(second)
+    assert registry.for_client(second.client) is second
+    assert list(registry) == [first, second]
+
+
+def test_register_replaces_session_with_same_alias():
+    registry = SessionRegistry()
+    old, new = _record('alias'), _record('alias')
+    registry.register(old)
+    registry.register(new)
+    assert registry['alias'] is new
+    assert len(registry) == 1
+    with pytest.raises(RuntimeError):
+        registry.for_client(old.client)
+
+
+def test_unknown_alias_and_clear():
+    registry = SessionRegistry()
+    registry.register(_record('alias'))
+    registry.clear()
+    with pytest.raises(RuntimeError, match="Non-existing index or alias 'alias'"):
+        registry['alias']
@@ -0,0 +1,45 @@
+import ssl
+
+from HttpxLibrary import HttpxLibrary
+from HttpxLibrary import sslcontext
+from utests import mock
+
+
+def test_same_settings_share_context():
+    sslcontext.clear_ssl_context_cache()
+    context = sslcontext.get_ssl_context(False)
+    assert sslcontext.get_ssl_context(False) is context
+    assert context.verify_mode is ssl.CERT_NONE
+    assert sslcontext.get_ssl_context(True) is not context
+
+
+@mock.patch('HttpxLibrary.sslcontext.httpx.create_ssl_context')
+def test_certificate_loaded_once(create_ssl_context):
+    sslcontext.clear_ssl_context_cache()
+    sslcontext.get_ssl_context(True, ['client.pem', 'client.key'])
+    context = sslcontext.get_ssl_context(True, ('client.pem', 'client.key'))
+    create_ssl_context.assert_called_once_with(verify=True)
+    context.load_cert_chain.assert_called_once_with('client.pem', 'client.key')
+
+
+def test_clear_ssl_context_cache():
+    sslcontext.clear_ssl_context_cache()
+    context = sslcontext.get_ssl_context(False)
+    assert HttpxLibrary.clear_ssl_context_cache() is None
+    assert sslcontext.get_ssl_context(False) is not context
+
+
+def test_sessions_share_context(keywords):
+    first = keywords.create_session('first', 'http://mocking.rules')
+    second = keywords.create_session('second', 'http://other.rules', retries=0)
+    assert first._transport._pool._ssl_context is second._transport._pool._ssl_context
+
+
+def test_http2_sessions_do_not_share_http1_context(keywords):
+    http1 = keywords.create_session('http1', 'https://mocking.rules')
+    http2 = keywords.create_session('http2', 'https://mocking.rules', http2=True)
+    # noinspection PyProtectedMember
+    http1_context, http2_context = (session._transport._pool._ssl_context for session in (http1, http2))
+    assert http1_context is not http2_context
+    assert keywords.create_session('other', 'https://other.rules', http2=True)._transport._pool._ssl_context \
+        is http2_context
@@ -0,0 +1,102 @@
+import asyncio
+
+import httpcore
+import httpx
+
+from HttpxLibrary.log import LogPolicy
+from HttpxLibrary.sessions import SessionRecord
+from HttpxLibrary.tracing import (AsyncRequestTrace, ConnectionCounts, RequestTrace, event_hooks,
+                                  format_wire_trace, trace_current_request)
+
+
+def test_request_trace_detects_new_connection():
+    chained = []
+    trace = RequestTrace(lambda name, info: chained.append(name))
+    trace('connection.connect_tcp.started', {})
+    trace('http11.send_request_headers.started', {})
+    assert trace.new_connection
+    assert chained == ['connection.connect_tcp.started', 'http11.send_request_headers.started']
+    reused = RequestTrace()
+    reused('http11.send_request_headers.started', {})
+    assert not reused.new_connection
+
+
+def test_async_request_trace_awaits_chained_trace():
+    chained = []
+
+    async def chained_trace(name, info):
+        chained.append(name)
+
+    trace = AsyncRequestTrace(chained_trace)
+    asyncio.run(trace('connection.connect_tcp.started', {}))
+    assert trace.new_connection
+    assert chained == ['connection.connect_tcp.started']
+
+
+def test_connection_counts():
+    counts = ConnectionCounts()
+    counts.record(True)
+    counts.record(False)
+    counts.record(False)
+    assert (counts.new, counts.reused) == (1, 2)
+    counts.reset()
+    assert (counts.new, counts.reused) == (0, 0)
+
+
+def test_event_hooks_count_connections():
+    record = SessionRecord('alias', None, 'http://mocking.rules', LogPolicy('off'))
+    hooks = event_hooks(record)
+    request = httpx.Request('GET', 'http://mocking.rules')
+    hooks['request'][0](request)
+    request.extensions['trace']('connection.connect_tcp.started', {})
+    hooks['response'][0](httpx.Response(200, request=request))
+    assert (record.connection_counts.new, record.connection_counts.reused) == (1, 0)
+
+
+def test_request_trace_timings():
+    trace = RequestTrace()
+    trace.events = [('connection.connect_tcp.started', 1.0), ('connection.connect_tcp.complete', 1.5),
+                    ('connection.start_tls.started', 1.5), ('connection.start_tls.complete', 2.0),
+                    ('http11.send_request_headers.started', 2.0), ('http11.send_request_headers.complete', 2.1),
+                    ('http11.send_request_body.started', 2.1), ('http11.send_request_body.complete', 2.25),
+                    ('http11.receive_response_headers.started', 2.25),
+                    ('http11.receive_response_headers.complete', 3.25),
+                    ('http11.receive_response_body.started', 3.25), ('http11.receive_response_body.complete', 4.0)]
+    assert trace.timings == {'connect': 0.5, 'tls': 0.5, 'send': 0.25, 'ttfb': 1.0, 'body': 0.75}
+
+
+def test_request_trace_timings_on_reused_connection():
+    trace = RequestTrace()
+    trace.events = [('http2.send_request_headers.started', 1.0), ('http2.send_request_body.complete', 1.5),
+                    ('http2.receive_response_headers.complete', 2.0)]
+    assert trace.timings == {'send': 0.5, 'ttfb': 0.5}
+
+
+def test_request_trace_dns_timing_from_network_backend():
+    trace = RequestTrace()
+    trace('connection.connect_tcp.started', {})
+    trace_current_request('connection.resolve.started')
+    trace_current_request('connection.resolve.complete')
+    trace('connection.connect_tcp.complete', {})
+    trace_current_request('connection.resolve.started')
+    assert [name for name, _ in trace.events].count('connection.resolve.started') == 1
+    assert set(trace.timings) == {'dns', 'connect'}
+
+
+def test_wire_trace_is_only_kept_when_enabled():
+    request = httpcore.Request('GET', 'http://mocking.rules:8080/path', headers=[(b'Accept', b'*/*')])
+    disabled = RequestTrace()
+    disabled('http11.send_request_headers.started', {'request': request})
+    assert disabled.wire is None
+    assert format_wire_trace(disabled) == ''
+    trace = RequestTrace(wire=True)
+    trace('http11.send_request_headers.started', {'request': request})
+    trace('http11.receive_response_headers.complete',
+          {'return_value': (b'HTTP/1.1', 200, b'OK', [(b'Content-Length', b'2')], b'')})
+    trace('connection.close.failed', {'exception': OSError('reset')})
+    lines = format_wire_trace(trace).splitlines()
+    assert lines[0] == '+0.000000s http11.send_request_headers.started GET http://mocking.rules:8080/path'
+    assert lines[1] == '    Accept: */*'
+    assert lines[2].endswith('http11.receive_response_headers.complete 200')
+    assert lines[3] == '    Content-Length: 2'
+    assert lines[4].endswith("connection.close.failed OSError('reset')")